@@ -0,0 +1,34 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    raw = "\x1f".join(str(p) for p in parts)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison.
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _validator_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    # Sets the validator on the pending response; returns a bodiless 304 when the client already has it.
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_validator_headers(etag))
+    response.headers.update(_validator_headers(etag))
+    return None
+
+
+def raw_json_response(body: bytes, etag: str) -> Response:
+    # For bodies that are already serialised JSON; returned Responses do not inherit headers set on `response`.
+    return Response(content=body, media_type="application/json", headers=_validator_headers(etag))
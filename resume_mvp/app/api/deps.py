@@ -1,31 +1,82 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import decode_access_token
+from app.core.config import get_settings
+from app.core.security import decode_access_token_cached
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
+from app.services.auth_service import principal_from_claims, resolve_principal, resolve_principal_async
 
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+def _token_claims(credentials: HTTPAuthorizationCredentials | None) -> dict:
     if not credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing token")
     token = credentials.credentials
     try:
-        payload = decode_access_token(token)
-        user_id = int(payload.get("sub"))
+        payload = decode_access_token_cached(token)
+        int(payload.get("sub"))
     except (JWTError, ValueError, TypeError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid token")
-    user = db.execute(select(User).where(User.id == user_id, User.status == 1)).scalars().first()
+    return payload
+
+
+def _token_user_id(credentials: HTTPAuthorizationCredentials | None) -> int:
+    return int(_token_claims(credentials)["sub"])
+
+
+def _require_user(user: User | None) -> User:
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="user not found")
     return user
 
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    return _require_user(resolve_principal(db, _token_user_id(credentials)))
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    return _require_user(await resolve_principal_async(db, _token_user_id(credentials)))
+
+
+def get_reader_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    # For read-only endpoints: with auth_trust_token_claims the token alone identifies the user,
+    # so a disabled user keeps read access until the token expires.
+    claims = _token_claims(credentials)
+    if get_settings().auth_trust_token_claims and (user := principal_from_claims(claims)):
+        return user
+    return _require_user(resolve_principal(db, int(claims["sub"])))
+
+
+async def get_reader_user_async(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    claims = _token_claims(credentials)
+    if get_settings().auth_trust_token_claims and (user := principal_from_claims(claims)):
+        return user
+    return _require_user(await resolve_principal_async(db, int(claims["sub"])))
+
+
+def require_internal_access(x_internal_token: str | None = Header(None)) -> None:
+    # Operational endpoints: open in dev, otherwise require the configured shared token.
+    settings = get_settings()
+    if settings.internal_api_token:
+        if x_internal_token != settings.internal_api_token:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
+    elif settings.app_env != "dev":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+
+_NO_DATA = object()
+
+
+def ok(data: Any = _NO_DATA, response: Response | None = None) -> ORJSONResponse:
+    # The standard envelope, serialised by orjson directly: returning a Response skips FastAPI's
+    # jsonable_encoder pass, so `data` must already be plain JSON types. Headers set on the injected
+    # `response` (ETag and the like) are not applied to returned Responses, so they are carried over here.
+    body = {"code": 0, "message": "ok"} if data is _NO_DATA else {"code": 0, "message": "ok", "data": data}
+    out = ORJSONResponse(body)
+    if response is not None:
+        out.headers.raw.extend(response.headers.raw)
+    return out
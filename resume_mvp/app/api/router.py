@@ -1,11 +1,17 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, billing, projects, tasks
+from app.api.v1 import auth, billing, internal, projects, projects_async, tasks, tasks_async
+from app.core.config import get_settings
 
 
 api_router = APIRouter(prefix="/api/v1")
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+if get_settings().async_db_enabled:
+    # Registered first so they take precedence over the sync routes with the same path.
+    api_router.include_router(projects_async.router, prefix="/projects", tags=["projects"])
+    api_router.include_router(tasks_async.router, prefix="/tasks", tags=["tasks"])
 api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
 api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 api_router.include_router(billing.router, prefix="/billing", tags=["billing"])
 
+api_router.include_router(internal.router, prefix="/internal", tags=["internal"])
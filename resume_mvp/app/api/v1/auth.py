@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_reader_user
+from app.api.responses import ok
 from app.core.config import get_settings
 from app.core.security import create_access_token
 from app.db.models import User
 from app.db.session import get_db
 from app.schemas.auth import LoginOtpIn, SendOtpIn
-from app.services.auth_service import get_or_create_user, issue_otp, verify_otp
+from app.services.auth_service import OtpThrottled, get_or_create_user, issue_otp, verify_otp
 
 
 router = APIRouter()
@@ -15,8 +16,11 @@ router = APIRouter()
 
 @router.post("/send-otp")
 def send_otp(payload: SendOtpIn, db: Session = Depends(get_db)):
-    issue_otp(db, payload.email)
-    return {"code": 0, "message": "ok", "data": {"dev_otp": get_settings().dev_otp}}
+    try:
+        issue_otp(db, payload.email)
+    except OtpThrottled as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return ok({"dev_otp": get_settings().dev_otp})
 
 
 @router.post("/login-otp")
@@ -24,15 +28,11 @@ def login_otp(payload: LoginOtpIn, db: Session = Depends(get_db)):
     if not verify_otp(db, payload.email, payload.otp):
         raise HTTPException(status_code=400, detail="invalid otp")
     user = get_or_create_user(db, payload.email)
-    token = create_access_token(str(user.id))
-    return {"code": 0, "message": "ok", "data": {"access_token": token, "token_type": "bearer"}}
+    token = create_access_token(str(user.id), {"email": user.email, "name": user.display_name})
+    return ok({"access_token": token, "token_type": "bearer"})
 
 
 @router.get("/me")
-def me(current_user: User = Depends(get_current_user)):
-    return {
-        "code": 0,
-        "message": "ok",
-        "data": {"id": current_user.id, "email": current_user.email, "display_name": current_user.display_name},
-    }
+def me(current_user: User = Depends(get_reader_user)):
+    return ok({"id": current_user.id, "email": current_user.email, "display_name": current_user.display_name})
 
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import require_internal_access
+from app.api.responses import ok
+from app.core import metrics
+from app.db.session import pool_stats
+from app.services.role_taxonomy import get_taxonomy
+
+
+router = APIRouter(dependencies=[Depends(require_internal_access)])
+
+
+@router.get("/metrics")
+def get_metrics():
+    return ok({"counters": metrics.snapshot(), "memo": metrics.hit_ratio("memo."), "auth": metrics.hit_ratio("auth."), "taxonomy": metrics.hit_ratio("taxonomy.")})
+
+
+@router.get("/db-pool")
+def get_db_pool():
+    # Process-local: with several uvicorn workers each one reports its own pools.
+    return ok(pool_stats())
+
+
+@router.get("/roles/resolve")
+def resolve_role(target_role: str = Query(..., min_length=1, max_length=100)):
+    # Which taxonomy role (and weighted keywords) a free-text target_role is scored against.
+    taxonomy = get_taxonomy()
+    role = taxonomy.resolve(target_role)
+    return ok({"role_id": role.id, "name": role.name, "keywords": dict(role.keywords), "taxonomy_version": taxonomy.version})
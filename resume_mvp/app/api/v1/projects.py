@@ -1,39 +1,131 @@
+import base64
 import json
 import os
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
 from fastapi.responses import FileResponse
 from sqlalchemy import desc, select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_current_user
-from app.db.models import ExportFile, JdProfile, ResumeProject, ResumeScore, ResumeSection, User
+from app.api.conditional import make_etag, not_modified, raw_json_response
+from app.api.deps import get_current_user, get_reader_user
+from app.api.responses import ok
+from app.core.config import get_settings
+from app.db.models import ExportFile, ProjectSnapshot, ResumeProject, ResumeSection, User
 from app.db.session import get_db
-from app.schemas.project import AnalyzeJdIn, CreateProjectTextIn, ExportIn, RewriteIn, UpdateSectionIn
-from app.services.export_service import export_project_to_pdf
-from app.services.project_service import (
-    analyze_jd,
-    create_project_from_file,
-    create_project_from_text,
-    parse_project,
-    rewrite_sections,
-    score_project,
-)
-from app.services.task_service import create_task, set_task_done, set_task_failed, set_task_running
+from app.schemas.project import AnalyzeJdIn, BatchRewriteIn, BatchScoreIn, CreateProjectTextIn, ExportIn, RankProjectsIn, RewriteIn, UpdateSectionIn
+from app.services.extract_service import ExtractionError
+from app.services.import_service import IMPORT_CHAINS, ImportFormatError, import_kind
+from app.services.project_service import analyze_jd, create_project_from_file, create_project_from_text, extract_keywords, touch_project
+from app.services.snapshot_service import build_project_detail
+from app.services.task_service import create_task
+from app.services.term_index_service import delete_project_terms, rank_projects
+from app.services.upload_service import UploadTooLarge, store_upload
 
 
 router = APIRouter()
 
 
+def _owned_project_where(user_id: int, project_id: int) -> tuple:
+    return (ResumeProject.id == project_id, ResumeProject.user_id == user_id, ResumeProject.is_deleted.is_(False))
+
+
+def _owned_project_stmt(user_id: int, project_id: int):
+    return select(ResumeProject).where(*_owned_project_where(user_id, project_id))
+
+
+def _project_version_stmt(user_id: int, project_id: int):
+    return select(ResumeProject.content_version).where(*_owned_project_where(user_id, project_id))
+
+
+def _project_etag(project_id: int, content_version: int) -> str:
+    return make_etag("project", project_id, content_version)
+
+
 def _require_owned_project(db: Session, user_id: int, project_id: int) -> ResumeProject:
-    project = db.execute(
-        select(ResumeProject).where(ResumeProject.id == project_id, ResumeProject.user_id == user_id, ResumeProject.is_deleted.is_(False))
-    ).scalars().first()
+    project = db.execute(_owned_project_stmt(user_id, project_id)).scalars().first()
     if not project:
         raise HTTPException(status_code=404, detail="project not found")
     return project
 
 
+def _owned_project_ids_stmt(user_id: int, project_ids: list[int]):
+    return select(ResumeProject.id).where(ResumeProject.id.in_(project_ids), ResumeProject.user_id == user_id, ResumeProject.is_deleted.is_(False))
+
+
+def _batch_project_ids(requested: list[int], owned_ids) -> list[int]:
+    # Deduplicated in request order; the whole batch is rejected if any project is not the caller's.
+    project_ids = list(dict.fromkeys(requested))
+    owned = set(owned_ids)
+    missing = [project_id for project_id in project_ids if project_id not in owned]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"projects not found: {', '.join(map(str, missing))}")
+    return project_ids
+
+
+PROJECT_PAGE_DEFAULT = 20
+PROJECT_PAGE_MAX = 100
+
+
+def _encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode("ascii")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str | None) -> int | None:
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def _project_page_stmt(user_id: int, after_id: int | None, limit: int):
+    # Keyset page over (user_id, id), newest first; one extra row tells whether another page exists.
+    # Only the listed columns are read, never source_text.
+    stmt = select(
+        ResumeProject.id,
+        ResumeProject.title,
+        ResumeProject.target_role,
+        ResumeProject.parse_status,
+        ResumeProject.created_at,
+        ResumeProject.content_version,
+    ).where(ResumeProject.user_id == user_id, ResumeProject.is_deleted.is_(False))
+    if after_id is not None:
+        stmt = stmt.where(ResumeProject.id < after_id)
+    return stmt.order_by(desc(ResumeProject.id)).limit(limit + 1)
+
+
+def _project_page_etag(user_id: int, cursor: str | None, rows) -> str:
+    return make_etag("projects", user_id, cursor, *((r.id, r.content_version) for r in rows))
+
+
+def _project_page(rows, limit: int) -> dict:
+    items = rows[:limit]
+    return {
+        "items": [_project_list_item(p) for p in items],
+        "next_cursor": _encode_cursor(items[-1].id) if len(rows) > limit else None,
+    }
+
+
+def _project_list_item(p) -> dict:
+    return {
+        "id": p.id,
+        "title": p.title,
+        "target_role": p.target_role,
+        "parse_status": p.parse_status,
+        "created_at": p.created_at.isoformat(),
+    }
+
+
+def _snapshot_body(snapshot: ProjectSnapshot | None, version: int) -> bytes | None:
+    # Served as stored, without decoding or re-encoding, when it matches the project's current version.
+    if snapshot is not None and snapshot.content_version == version:
+        return snapshot.body
+    return None
+
+
 @router.post("")
 def create_project_text(payload: CreateProjectTextIn, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     project = create_project_from_text(
@@ -45,7 +137,7 @@ def create_project_text(payload: CreateProjectTextIn, current_user: User = Depen
         years_experience=payload.years_experience,
         source_text=payload.source_text,
     )
-    return {"code": 0, "message": "ok", "data": {"project_id": project.id}}
+    return ok({"project_id": project.id})
 
 
 @router.post("/from-file")
@@ -58,176 +150,168 @@ async def create_project_file(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    content = await file.read()
-    project = create_project_from_file(
-        db=db,
-        user_id=current_user.id,
-        title=title,
-        target_role=target_role,
-        target_city=target_city,
-        years_experience=years_experience,
-        filename=file.filename,
-        content=content,
+    try:
+        stored = await store_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    # Text extraction and DB writes are blocking; keep them off the event loop.
+    try:
+        project = await run_in_threadpool(
+            create_project_from_file,
+            db=db,
+            user_id=current_user.id,
+            title=title,
+            target_role=target_role,
+            target_city=target_city,
+            years_experience=years_experience,
+            file_path=stored.file_path,
+            content_hash=stored.sha256,
+        )
+    except ExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ok({"project_id": project.id})
+
+
+@router.post("/import")
+async def import_projects_file(
+    file: UploadFile = File(...),
+    target_role: str | None = Form(None),
+    chain: str = Form("none"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # ZIP of .txt/.pdf/.docx files (all get target_role) or JSONL with one project object per line.
+    try:
+        kind = import_kind(file.filename or "")
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if chain not in IMPORT_CHAINS:
+        raise HTTPException(status_code=400, detail=f"chain must be one of {', '.join(IMPORT_CHAINS)}")
+    if kind == "zip" and not target_role:
+        raise HTTPException(status_code=400, detail="target_role is required for zip imports")
+    try:
+        # Private: the import task deletes the archive when it is done.
+        stored = await store_upload(file, max_bytes=get_settings().import_max_upload_bytes, private=True)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    payload = {"path": stored.file_path, "kind": kind, "target_role": target_role, "chain": chain}
+    task = await run_in_threadpool(create_task, db, current_user.id, "import", None, payload)
+    return ok({"task_id": task.id})
+
+
+@router.post("/rank")
+def rank(payload: RankProjectsIn, current_user: User = Depends(get_reader_user), db: Session = Depends(get_db)):
+    # The caller's parsed projects best matching a JD, from the project_terms index.
+    return ok(rank_projects(db, current_user.id, extract_keywords(payload.jd_text), payload.top_k))
+
+
+# Declared before the /{project_id}/... routes, which would otherwise capture "batch".
+@router.post("/batch/score")
+def batch_score(payload: BatchScoreIn, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    project_ids = _batch_project_ids(payload.project_ids, db.execute(_owned_project_ids_stmt(current_user.id, payload.project_ids)).scalars())
+    task = create_task(db, current_user.id, "batch_score", payload={"project_ids": project_ids, "target_role": payload.target_role})
+    return ok({"task_id": task.id})
+
+
+@router.post("/batch/rewrite")
+def batch_rewrite(payload: BatchRewriteIn, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    project_ids = _batch_project_ids(payload.project_ids, db.execute(_owned_project_ids_stmt(current_user.id, payload.project_ids)).scalars())
+    task = create_task(
+        db, current_user.id, "batch_rewrite", payload={"project_ids": project_ids, "mode": payload.mode, "use_jd": payload.use_jd}
     )
-    return {"code": 0, "message": "ok", "data": {"project_id": project.id}}
+    return ok({"task_id": task.id})
 
 
 @router.get("")
-def list_projects(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = db.execute(
-        select(ResumeProject)
-        .where(ResumeProject.user_id == current_user.id, ResumeProject.is_deleted.is_(False))
-        .order_by(desc(ResumeProject.id))
-    ).scalars().all()
-    return {
-        "code": 0,
-        "message": "ok",
-        "data": [
-            {
-                "id": p.id,
-                "title": p.title,
-                "target_role": p.target_role,
-                "parse_status": p.parse_status,
-                "created_at": p.created_at.isoformat(),
-            }
-            for p in rows
-        ],
-    }
+def list_projects(
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(PROJECT_PAGE_DEFAULT, ge=1, le=PROJECT_PAGE_MAX),
+    current_user: User = Depends(get_reader_user),
+    db: Session = Depends(get_db),
+):
+    rows = db.execute(_project_page_stmt(current_user.id, _decode_cursor(cursor), limit)).all()
+    if (cached := not_modified(request, response, _project_page_etag(current_user.id, cursor, rows))) is not None:
+        return cached
+    return ok(_project_page(rows, limit), response)
 
 
 @router.get("/{project_id}")
-def get_project(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_project(
+    project_id: int, request: Request, response: Response, current_user: User = Depends(get_reader_user), db: Session = Depends(get_db)
+):
+    # The version check is one indexed lookup; the stored snapshot is only read when the client copy is stale.
+    version = db.execute(_project_version_stmt(current_user.id, project_id)).scalar()
+    if version is None:
+        raise HTTPException(status_code=404, detail="project not found")
+    etag = _project_etag(project_id, version)
+    if (cached := not_modified(request, response, etag)) is not None:
+        return cached
+    body = _snapshot_body(db.get(ProjectSnapshot, project_id), version)
+    if body is not None:
+        return raw_json_response(body, etag)
+    # No current snapshot (project predates them, see `python -m app.cli check-snapshots`): build it live.
     project = _require_owned_project(db, current_user.id, project_id)
-    sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id).order_by(ResumeSection.sort_order)).scalars().all()
-    score = db.execute(select(ResumeScore).where(ResumeScore.project_id == project.id)).scalars().first()
-    jd = db.execute(select(JdProfile).where(JdProfile.project_id == project.id)).scalars().first()
-    return {
-        "code": 0,
-        "message": "ok",
-        "data": {
-            "project": {
-                "id": project.id,
-                "title": project.title,
-                "target_role": project.target_role,
-                "target_city": project.target_city,
-                "years_experience": project.years_experience,
-                "parse_status": project.parse_status,
-            },
-            "sections": [
-                {
-                    "id": s.id,
-                    "section_type": s.section_type,
-                    "origin_text": s.origin_text,
-                    "optimized_text": s.optimized_text,
-                    "is_accepted": s.is_accepted,
-                }
-                for s in sections
-            ],
-            "score": (
-                {
-                    "ats_score": score.ats_score,
-                    "completeness_score": score.completeness_score,
-                    "match_score": score.match_score,
-                    "issues": json.loads(score.issues_json),
-                }
-                if score
-                else None
-            ),
-            "jd_profile": (
-                {
-                    "keywords": json.loads(jd.keywords_json),
-                    "missing_keywords": json.loads(jd.missing_keywords_json),
-                }
-                if jd
-                else None
-            ),
-        },
-    }
+    return ok(build_project_detail(db, project), response)
 
 
 @router.delete("/{project_id}")
 def delete_project(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     project = _require_owned_project(db, current_user.id, project_id)
     project.is_deleted = True
+    delete_project_terms(db, project.id)
+    touch_project(project)
     db.commit()
-    return {"code": 0, "message": "ok"}
+    return ok()
 
 
 @router.post("/{project_id}/parse")
 def parse(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     project = _require_owned_project(db, current_user.id, project_id)
     task = create_task(db, current_user.id, "parse", project.id)
-    try:
-        set_task_running(db, task)
-        sections = parse_project(db, project)
-        set_task_done(db, task, {"section_count": len(sections)})
-    except Exception as e:
-        project.parse_status = 2
-        db.commit()
-        set_task_failed(db, task, str(e))
-    return {"code": 0, "message": "ok", "data": {"task_id": task.id}}
+    return ok({"task_id": task.id})
 
 
 @router.post("/{project_id}/score")
 def score(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     project = _require_owned_project(db, current_user.id, project_id)
     task = create_task(db, current_user.id, "score", project.id)
-    try:
-        set_task_running(db, task)
-        score_obj = score_project(db, project)
-        set_task_done(
-            db,
-            task,
-            {
-                "ats_score": score_obj.ats_score,
-                "completeness_score": score_obj.completeness_score,
-                "match_score": score_obj.match_score,
-            },
-        )
-    except Exception as e:
-        set_task_failed(db, task, str(e))
-    return {"code": 0, "message": "ok", "data": {"task_id": task.id}}
+    return ok({"task_id": task.id})
 
 
 @router.post("/{project_id}/jd/analyze")
 def jd_analyze(project_id: int, payload: AnalyzeJdIn, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     project = _require_owned_project(db, current_user.id, project_id)
     profile = analyze_jd(db, project, payload.jd_text)
-    return {
-        "code": 0,
-        "message": "ok",
-        "data": {"keywords": json.loads(profile.keywords_json), "missing_keywords": json.loads(profile.missing_keywords_json)},
-    }
+    db.commit()
+    return ok({"keywords": json.loads(profile.keywords_json), "missing_keywords": json.loads(profile.missing_keywords_json)})
 
 
 @router.post("/{project_id}/rewrite")
 def rewrite(project_id: int, payload: RewriteIn, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     project = _require_owned_project(db, current_user.id, project_id)
-    task = create_task(db, current_user.id, "rewrite", project.id)
-    try:
-        set_task_running(db, task)
-        sections = rewrite_sections(db, project, payload.mode, payload.use_jd)
-        set_task_done(db, task, {"section_count": len(sections)})
-    except Exception as e:
-        set_task_failed(db, task, str(e))
-    return {"code": 0, "message": "ok", "data": {"task_id": task.id}}
+    task = create_task(db, current_user.id, "rewrite", project.id, {"mode": payload.mode, "use_jd": payload.use_jd})
+    return ok({"task_id": task.id})
 
 
 @router.put("/sections/{section_id}")
 def update_section(section_id: int, payload: UpdateSectionIn, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    section = db.execute(
-        select(ResumeSection)
+    row = db.execute(
+        select(ResumeSection, ResumeProject)
         .join(ResumeProject, ResumeProject.id == ResumeSection.project_id)
         .where(ResumeSection.id == section_id, ResumeProject.user_id == current_user.id)
-    ).scalars().first()
-    if not section:
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="section not found")
+    section, project = row
     if payload.optimized_text is not None:
         section.optimized_text = payload.optimized_text
     if payload.is_accepted is not None:
         section.is_accepted = payload.is_accepted
+    touch_project(project)
     db.commit()
-    return {"code": 0, "message": "ok"}
+    return ok()
 
 
 @router.post("/{project_id}/export")
@@ -235,18 +319,12 @@ def export(project_id: int, payload: ExportIn, current_user: User = Depends(get_
     if payload.format.lower() != "pdf":
         raise HTTPException(status_code=400, detail="MVP only supports pdf")
     project = _require_owned_project(db, current_user.id, project_id)
-    task = create_task(db, current_user.id, "export", project.id)
-    try:
-        set_task_running(db, task)
-        export = export_project_to_pdf(db, project)
-        set_task_done(db, task, {"export_id": export.id, "format": export.format})
-    except Exception as e:
-        set_task_failed(db, task, str(e))
-    return {"code": 0, "message": "ok", "data": {"task_id": task.id}}
+    task = create_task(db, current_user.id, "export", project.id, {"format": "pdf", "template": payload.template})
+    return ok({"task_id": task.id})
 
 
 @router.get("/exports/{export_id}/download")
-def download_export(export_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def download_export(export_id: int, current_user: User = Depends(get_reader_user), db: Session = Depends(get_db)):
     row = db.execute(
         select(ExportFile)
         .join(ResumeProject, ResumeProject.id == ExportFile.project_id)
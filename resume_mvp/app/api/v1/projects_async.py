@@ -0,0 +1,176 @@
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.conditional import not_modified, raw_json_response
+from app.api.deps import get_current_user_async, get_reader_user_async
+from app.api.responses import ok
+from app.api.v1.projects import (
+    PROJECT_PAGE_DEFAULT,
+    PROJECT_PAGE_MAX,
+    _batch_project_ids,
+    _decode_cursor,
+    _owned_project_ids_stmt,
+    _owned_project_stmt,
+    _project_etag,
+    _project_page,
+    _project_page_etag,
+    _project_page_stmt,
+    _project_version_stmt,
+    _snapshot_body,
+)
+from app.db.models import ProjectSnapshot, ResumeProject, User
+from app.db.session import get_async_db
+from app.schemas.project import BatchRewriteIn, BatchScoreIn, CreateProjectTextIn, ExportIn, RewriteIn
+from app.services.extract_service import ExtractionError
+from app.services.project_service import create_project_from_file_async, create_project_from_text_async
+from app.services.snapshot_service import build_project_detail
+from app.services.task_service import create_task_async
+from app.services.upload_service import UploadTooLarge, store_upload
+
+
+# AsyncSession variants of the request-pipeline routes in projects.py, mounted ahead of them when
+# async_db_enabled is set. Routes not listed here keep being served by the sync router.
+router = APIRouter()
+
+
+async def _require_owned_project(db: AsyncSession, user_id: int, project_id: int) -> ResumeProject:
+    project = (await db.execute(_owned_project_stmt(user_id, project_id))).scalars().first()
+    if not project:
+        raise HTTPException(status_code=404, detail="project not found")
+    return project
+
+
+@router.post("")
+async def create_project_text_async(
+    payload: CreateProjectTextIn, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)
+):
+    project = await create_project_from_text_async(
+        db=db,
+        user_id=current_user.id,
+        title=payload.title,
+        target_role=payload.target_role,
+        target_city=payload.target_city,
+        years_experience=payload.years_experience,
+        source_text=payload.source_text,
+    )
+    return ok({"project_id": project.id})
+
+
+@router.post("/from-file")
+async def create_project_file_async(
+    title: str = Form(...),
+    target_role: str = Form(...),
+    target_city: str | None = Form(None),
+    years_experience: int | None = Form(None),
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        stored = await store_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        project = await create_project_from_file_async(
+            db=db,
+            user_id=current_user.id,
+            title=title,
+            target_role=target_role,
+            target_city=target_city,
+            years_experience=years_experience,
+            file_path=stored.file_path,
+            content_hash=stored.sha256,
+        )
+    except ExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ok({"project_id": project.id})
+
+
+@router.post("/batch/score")
+async def batch_score_async(payload: BatchScoreIn, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    owned = (await db.execute(_owned_project_ids_stmt(current_user.id, payload.project_ids))).scalars()
+    project_ids = _batch_project_ids(payload.project_ids, owned)
+    task = await create_task_async(db, current_user.id, "batch_score", payload={"project_ids": project_ids, "target_role": payload.target_role})
+    return ok({"task_id": task.id})
+
+
+@router.post("/batch/rewrite")
+async def batch_rewrite_async(
+    payload: BatchRewriteIn, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)
+):
+    owned = (await db.execute(_owned_project_ids_stmt(current_user.id, payload.project_ids))).scalars()
+    project_ids = _batch_project_ids(payload.project_ids, owned)
+    task = await create_task_async(
+        db, current_user.id, "batch_rewrite", payload={"project_ids": project_ids, "mode": payload.mode, "use_jd": payload.use_jd}
+    )
+    return ok({"task_id": task.id})
+
+
+@router.get("")
+async def list_projects_async(
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(PROJECT_PAGE_DEFAULT, ge=1, le=PROJECT_PAGE_MAX),
+    current_user: User = Depends(get_reader_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    rows = (await db.execute(_project_page_stmt(current_user.id, _decode_cursor(cursor), limit))).all()
+    if (cached := not_modified(request, response, _project_page_etag(current_user.id, cursor, rows))) is not None:
+        return cached
+    return ok(_project_page(rows, limit), response)
+
+
+@router.get("/{project_id}")
+async def get_project_async(
+    project_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_reader_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    version = (await db.execute(_project_version_stmt(current_user.id, project_id))).scalar()
+    if version is None:
+        raise HTTPException(status_code=404, detail="project not found")
+    etag = _project_etag(project_id, version)
+    if (cached := not_modified(request, response, etag)) is not None:
+        return cached
+    body = _snapshot_body(await db.get(ProjectSnapshot, project_id), version)
+    if body is not None:
+        return raw_json_response(body, etag)
+    project = await _require_owned_project(db, current_user.id, project_id)
+    return ok(await db.run_sync(build_project_detail, project), response)
+
+
+@router.post("/{project_id}/parse")
+async def parse_async(project_id: int, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    project = await _require_owned_project(db, current_user.id, project_id)
+    task = await create_task_async(db, current_user.id, "parse", project.id)
+    return ok({"task_id": task.id})
+
+
+@router.post("/{project_id}/score")
+async def score_async(project_id: int, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    project = await _require_owned_project(db, current_user.id, project_id)
+    task = await create_task_async(db, current_user.id, "score", project.id)
+    return ok({"task_id": task.id})
+
+
+@router.post("/{project_id}/rewrite")
+async def rewrite_async(
+    project_id: int, payload: RewriteIn, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)
+):
+    project = await _require_owned_project(db, current_user.id, project_id)
+    task = await create_task_async(db, current_user.id, "rewrite", project.id, {"mode": payload.mode, "use_jd": payload.use_jd})
+    return ok({"task_id": task.id})
+
+
+@router.post("/{project_id}/export")
+async def export_async(
+    project_id: int, payload: ExportIn, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)
+):
+    if payload.format.lower() != "pdf":
+        raise HTTPException(status_code=400, detail="MVP only supports pdf")
+    project = await _require_owned_project(db, current_user.id, project_id)
+    task = await create_task_async(db, current_user.id, "export", project.id, {"format": "pdf", "template": payload.template})
+    return ok({"task_id": task.id})
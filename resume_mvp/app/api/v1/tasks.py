@@ -1,32 +1,134 @@
+import asyncio
 import json
+from collections.abc import AsyncIterator, Awaitable, Callable
 
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_current_user
+from app.api.conditional import etag_matches, make_etag, not_modified
+from app.api.deps import get_reader_user
+from app.api.responses import ok
+from app.core.config import get_settings
 from app.db.models import AsyncTask, User
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
+from app.services.task_events import TERMINAL_TASK_STATUSES, task_hub, task_version
 
 
 router = APIRouter()
 
+TaskStateLoader = Callable[[], Awaitable[tuple[tuple, dict] | None]]
+
+
+def _owned_task_stmt(user_id: int, task_id: int):
+    return select(AsyncTask).where(AsyncTask.id == task_id, AsyncTask.user_id == user_id)
+
+
+def _task_version_stmt(user_id: int, task_id: int):
+    return select(AsyncTask.status, AsyncTask.attempts, AsyncTask.updated_at).where(AsyncTask.id == task_id, AsyncTask.user_id == user_id)
+
+
+def _task_etag(task_id: int, version_row) -> str:
+    return make_etag("task", task_id, *version_row)
+
+
+def _task_out(task: AsyncTask) -> dict:
+    return {
+        "id": task.id,
+        "task_type": task.task_type,
+        "status": task.status,
+        "error_message": task.error_message,
+        "result": json.loads(task.result_json) if task.result_json else None,
+    }
+
+
+async def _wait_for_task_change(request: Request, task_id: int, version_row, wait: float) -> bool:
+    # Long-poll: park only while the client is up to date (no validator, or the current one) and the
+    # task can still change; the caller re-reads afterwards.
+    if wait <= 0 or version_row.status in TERMINAL_TASK_STATUSES:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and not etag_matches(if_none_match, _task_etag(task_id, version_row)):
+        return False
+    timeout = min(wait, get_settings().task_wait_max_seconds)
+    return await task_hub.wait_for_change(task_id, task_version(version_row), timeout)
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def _task_event_stream(request: Request, task_id: int, load: TaskStateLoader) -> AsyncIterator[bytes]:
+    # One `status` event per version change, ending after a terminal status; comment lines keep
+    # proxies from closing an idle stream.
+    heartbeat = get_settings().task_events_heartbeat_seconds
+    sent_version = None
+    while True:
+        state = await load()
+        if state is None:
+            return
+        version, out = state
+        if version != sent_version:
+            sent_version = version
+            yield _sse("status", out)
+            if out["status"] in TERMINAL_TASK_STATUSES:
+                return
+        changed = await task_hub.wait_for_change(task_id, version, heartbeat)
+        if await request.is_disconnected():
+            return
+        if not changed:
+            yield b": keep-alive\n\n"
+
+
+def task_event_response(request: Request, task_id: int, load: TaskStateLoader) -> StreamingResponse:
+    return StreamingResponse(
+        _task_event_stream(request, task_id, load),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _load_task_state(user_id: int, task_id: int) -> tuple[tuple, dict] | None:
+    # The stream outlives the request's session, so each read opens its own.
+    db = SessionLocal()
+    try:
+        task = db.execute(_owned_task_stmt(user_id, task_id)).scalars().first()
+        return (task_version(task), _task_out(task)) if task else None
+    finally:
+        db.close()
+
 
 @router.get("/{task_id}")
-def get_task(task_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    task = db.execute(select(AsyncTask).where(AsyncTask.id == task_id, AsyncTask.user_id == current_user.id)).scalars().first()
+async def get_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, description="seconds to hold the request until the task status changes"),
+    current_user: User = Depends(get_reader_user),
+    db: Session = Depends(get_db),
+):
+    version_row = await run_in_threadpool(lambda: db.execute(_task_version_stmt(current_user.id, task_id)).first())
+    if not version_row:
+        raise HTTPException(status_code=404, detail="task not found")
+    if wait:
+        # Hand the connection back to the pool while parked.
+        await run_in_threadpool(db.rollback)
+        if await _wait_for_task_change(request, task_id, version_row, wait):
+            version_row = await run_in_threadpool(lambda: db.execute(_task_version_stmt(current_user.id, task_id)).first())
+    if (cached := not_modified(request, response, _task_etag(task_id, version_row))) is not None:
+        return cached
+    task = await run_in_threadpool(lambda: db.execute(_owned_task_stmt(current_user.id, task_id)).scalars().first())
     if not task:
         raise HTTPException(status_code=404, detail="task not found")
-    result = json.loads(task.result_json) if task.result_json else None
-    return {
-        "code": 0,
-        "message": "ok",
-        "data": {
-            "id": task.id,
-            "task_type": task.task_type,
-            "status": task.status,
-            "error_message": task.error_message,
-            "result": result,
-        },
-    }
+    return ok(_task_out(task), response)
+
 
+@router.get("/{task_id}/events")
+def task_events(task_id: int, request: Request, current_user: User = Depends(get_reader_user), db: Session = Depends(get_db)):
+    if not db.execute(_task_version_stmt(current_user.id, task_id)).first():
+        raise HTTPException(status_code=404, detail="task not found")
+    user_id = current_user.id
+    return task_event_response(request, task_id, lambda: asyncio.to_thread(_load_task_state, user_id, task_id))
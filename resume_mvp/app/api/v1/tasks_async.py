@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.conditional import not_modified
+from app.api.deps import get_reader_user_async
+from app.api.responses import ok
+from app.api.v1.tasks import _owned_task_stmt, _task_etag, _task_out, _task_version_stmt, _wait_for_task_change, task_event_response
+from app.db.models import User
+from app.db.session import get_async_db, get_async_sessionmaker
+from app.services.task_events import task_version
+
+
+router = APIRouter()
+
+
+async def _load_task_state_async(user_id: int, task_id: int):
+    async with get_async_sessionmaker()() as db:
+        task = (await db.execute(_owned_task_stmt(user_id, task_id))).scalars().first()
+        return (task_version(task), _task_out(task)) if task else None
+
+
+@router.get("/{task_id}")
+async def get_task_async(
+    task_id: int,
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, description="seconds to hold the request until the task status changes"),
+    current_user: User = Depends(get_reader_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    version_row = (await db.execute(_task_version_stmt(current_user.id, task_id))).first()
+    if not version_row:
+        raise HTTPException(status_code=404, detail="task not found")
+    if wait:
+        await db.rollback()
+        if await _wait_for_task_change(request, task_id, version_row, wait):
+            version_row = (await db.execute(_task_version_stmt(current_user.id, task_id))).first()
+    if (cached := not_modified(request, response, _task_etag(task_id, version_row))) is not None:
+        return cached
+    task = (await db.execute(_owned_task_stmt(current_user.id, task_id))).scalars().first()
+    if not task:
+        raise HTTPException(status_code=404, detail="task not found")
+    return ok(_task_out(task), response)
+
+
+@router.get("/{task_id}/events")
+async def task_events_async(
+    task_id: int, request: Request, current_user: User = Depends(get_reader_user_async), db: AsyncSession = Depends(get_async_db)
+):
+    if not (await db.execute(_task_version_stmt(current_user.id, task_id))).first():
+        raise HTTPException(status_code=404, detail="task not found")
+    user_id = current_user.id
+    return task_event_response(request, task_id, lambda: _load_task_state_async(user_id, task_id))
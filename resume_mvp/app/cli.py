@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import sys
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal, init_db
+from app.services.auth_service import purge_otps, set_user_status
+from app.services.billing_service import reconcile_usage
+from app.services.export_service import gc_exports
+from app.services.import_service import IMPORT_CHAINS, import_kind, import_projects
+from app.services.rescore_service import rescore_projects
+from app.services.snapshot_service import check_snapshots
+from app.services.term_index_service import reindex_projects
+
+
+def cmd_upgrade_db(args: argparse.Namespace) -> dict:
+    return {"applied": init_db()}
+
+
+def cmd_gc_exports(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return gc_exports(db, args.keep, args.orphan_min_age)
+    finally:
+        db.close()
+
+
+def cmd_purge_otps(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return {"purged": purge_otps(db, args.batch_size)}
+    finally:
+        db.close()
+
+
+def cmd_reconcile_usage(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return reconcile_usage(db, fix=not args.dry_run)
+    finally:
+        db.close()
+
+
+def cmd_check_snapshots(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return check_snapshots(db, fix=args.fix)
+    finally:
+        db.close()
+
+
+def cmd_set_user_status(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return {"user_id": args.user_id, "status": args.status, "updated": set_user_status(db, args.user_id, args.status)}
+    finally:
+        db.close()
+
+
+def cmd_import_projects(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return import_projects(
+            db,
+            args.user_id,
+            args.path,
+            import_kind(args.path),
+            args.target_role,
+            args.chain,
+            on_batch=lambda state: print(json.dumps({k: state[k] for k in ("processed", "created", "failed")}), file=sys.stderr),
+        )
+    finally:
+        db.close()
+
+
+def cmd_rescore(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return rescore_projects(
+            db,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            force=args.force,
+            on_chunk=lambda state: print(json.dumps(state), file=sys.stderr),
+        )
+    finally:
+        db.close()
+
+
+def cmd_reindex_terms(args: argparse.Namespace) -> dict:
+    db = SessionLocal()
+    try:
+        return reindex_projects(db, chunk_size=args.chunk_size, force=args.force)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Maintenance commands.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("upgrade-db", help="create missing tables and add columns/indexes missing from existing ones")
+    p.set_defaults(func=cmd_upgrade_db)
+
+    p = sub.add_parser("gc-exports", help="apply export retention and delete orphaned export files")
+    p.add_argument("--keep", type=int, default=get_settings().export_retention_per_project)
+    p.add_argument("--orphan-min-age", type=int, default=3600, help="seconds before an unreferenced file is removed")
+    p.set_defaults(func=cmd_gc_exports)
+
+    p = sub.add_parser("purge-otps", help="delete expired login codes in small batches")
+    p.add_argument("--batch-size", type=int, default=get_settings().otp_purge_batch_size)
+    p.set_defaults(func=cmd_purge_otps)
+
+    p = sub.add_parser("reconcile-usage", help="rebuild monthly usage rollups from usage_ledger and report drift")
+    p.add_argument("--dry-run", action="store_true", help="only report drift")
+    p.set_defaults(func=cmd_reconcile_usage)
+
+    p = sub.add_parser("check-snapshots", help="compare project detail snapshots with the live tables")
+    p.add_argument("--fix", action="store_true", help="rebuild missing or differing snapshots")
+    p.set_defaults(func=cmd_check_snapshots)
+
+    p = sub.add_parser("set-user-status", help="enable (1) or disable (0) a user; API processes drop it from their principal cache within AUTH_PRINCIPAL_INVALIDATION_POLL_SECONDS")
+    p.add_argument("user_id", type=int)
+    p.add_argument("status", type=int)
+    p.set_defaults(func=cmd_set_user_status)
+
+    p = sub.add_parser("import-projects", help="bulk-create a user's projects from a .zip of resumes or a .jsonl file")
+    p.add_argument("user_id", type=int)
+    p.add_argument("path")
+    p.add_argument("--target-role", help="target_role for zip members and JSONL lines without one")
+    p.add_argument("--chain", choices=IMPORT_CHAINS, default="none", help="also parse (and score) the new projects")
+    p.set_defaults(func=cmd_import_projects)
+
+    p = sub.add_parser("rescore", help="recompute stale resume_scores (e.g. after SCORE_ALGO_VERSION changed) in chunks")
+    p.add_argument("--chunk-size", type=int, default=500)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes; 0 scores in-process")
+    p.add_argument("--checkpoint", help="progress file; rerunning with it continues an interrupted run")
+    p.add_argument("--force", action="store_true", help="rescore projects whose score is up to date as well")
+    p.set_defaults(func=cmd_rescore)
+
+    p = sub.add_parser("reindex-terms", help="build the project_terms ranking index for parsed projects that lack it")
+    p.add_argument("--chunk-size", type=int, default=500)
+    p.add_argument("--force", action="store_true", help="rebuild every parsed project's terms")
+    p.set_defaults(func=cmd_reindex_terms)
+
+    args = parser.parse_args()
+    print(json.dumps(args.func(args), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
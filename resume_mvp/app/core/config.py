@@ -11,12 +11,69 @@ class Settings(BaseSettings):
     app_debug: bool = True
     app_secret_key: str = "change-me-in-production"
     access_token_expire_minutes: int = 60 * 24
+    # Resolved users are cached per process; users updated elsewhere (e.g. disabled) are dropped from the
+    # cache by a check of users.updated_at that runs at most every auth_principal_invalidation_poll_seconds.
+    auth_principal_cache_size: int = 10000
+    auth_principal_cache_ttl_seconds: int = 60
+    auth_principal_invalidation_poll_seconds: float = 1.0
+    auth_token_cache_size: int = 10000
+    # Read-only endpoints trust the user claims in the token instead of looking the user up.
+    auth_trust_token_claims: bool = False
     database_url: str = "sqlite:///./resume_mvp.db"
+    # Serve the request pipeline through AsyncSession (aiosqlite/asyncpg); the URL defaults to database_url.
+    async_db_enabled: bool = False
+    async_database_url: str | None = None
+
+    # Engine tuning applied per backend, see app/db/session.engine_options.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_busy_timeout_ms: int = 5000
     storage_dir: str = "./app/data"
     dev_otp: str = "123456"
+    otp_ttl_minutes: int = 10
+    # Per-email send-otp throttling; rows are kept for the window so they can be counted.
+    otp_send_min_interval_seconds: int = 60
+    otp_send_max_per_window: int = 5
+    otp_send_window_seconds: int = 3600
+    otp_purge_batch_size: int = 1000
+    internal_api_token: str | None = None
+    export_retention_per_project: int = 3
+    max_upload_bytes: int = 10 * 1024 * 1024
+    upload_chunk_bytes: int = 256 * 1024
+    # Bulk import (POST /projects/import, `cli import-projects`): archive size cap and projects per commit.
+    import_max_upload_bytes: int = 512 * 1024 * 1024
+    import_batch_size: int = 200
+    extract_workers: int = 2
+    extract_max_pages: int = 30
+    extract_time_budget_seconds: float = 20.0
+    # Role taxonomy used for score keyword matching; defaults to app/resources/role_taxonomy.json.
+    # The file is re-read when its mtime changes, checked at most every role_taxonomy_reload_seconds.
+    role_taxonomy_path: str | None = None
+    role_taxonomy_reload_seconds: int = 30
+
+    # Background worker: number of processes per task_type, see app/worker.py.
+    worker_concurrency: dict[str, int] = {"parse": 2, "score": 2, "rewrite": 2, "export": 1, "batch_score": 1, "batch_rewrite": 1, "import": 1}
+    worker_poll_interval_seconds: float = 1.0
+    worker_lease_seconds: int = 60
+    task_max_attempts: int = 3
+    task_retry_backoff_seconds: int = 5
+    task_retry_backoff_max_seconds: int = 300
+    worker_metrics_log_interval_seconds: int = 300
+    # Task status push (long-poll / SSE): "db_poll" sees status changes made by worker processes,
+    # "local" only those committed inside the API process.
+    task_events_channel: str = "db_poll"
+    task_events_poll_interval_seconds: float = 0.5
+    task_wait_max_seconds: int = 30
+    task_events_heartbeat_seconds: int = 15
 
 
 @lru_cache
 def get_settings() -> Settings:
     return Settings()
-
@@ -0,0 +1,30 @@
+import threading
+from collections import Counter
+
+
+# Process-local counters (cache hits/misses and the like). Each API/worker process keeps its own.
+_lock = threading.Lock()
+_counters: Counter[str] = Counter()
+
+
+def incr(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot(prefix: str = "") -> dict[str, int]:
+    with _lock:
+        return {k: v for k, v in sorted(_counters.items()) if k.startswith(prefix)}
+
+
+def hit_ratio(prefix: str) -> dict[str, dict[str, float]]:
+    # Groups "<prefix><name>.hit" / "<prefix><name>.miss" counters into {name: {hit, miss, hit_ratio}}.
+    out: dict[str, dict[str, float]] = {}
+    for key, value in snapshot(prefix).items():
+        name, _, kind = key[len(prefix) :].rpartition(".")
+        if kind in ("hit", "miss"):
+            out.setdefault(name, {"hit": 0, "miss": 0})[kind] = value
+    for stats in out.values():
+        total = stats["hit"] + stats["miss"]
+        stats["hit_ratio"] = round(stats["hit"] / total, 4) if total else 0.0
+    return out
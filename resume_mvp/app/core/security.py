@@ -1,19 +1,22 @@
 from datetime import datetime, timedelta, timezone
 import hashlib
+import time
 from typing import Any
 
 from jose import jwt
 
+from app.core import metrics
 from app.core.config import get_settings
+from app.core.ttl_cache import TTLCache
 
 
 ALGORITHM = "HS256"
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, claims: dict[str, Any] | None = None) -> str:
     settings = get_settings()
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
-    payload: dict[str, Any] = {"sub": subject, "exp": expire}
+    payload: dict[str, Any] = {**(claims or {}), "sub": subject, "exp": expire}
     return jwt.encode(payload, settings.app_secret_key, algorithm=ALGORITHM)
 
 
@@ -22,6 +25,24 @@ def decode_access_token(token: str) -> dict[str, Any]:
     return jwt.decode(token, settings.app_secret_key, algorithms=[ALGORITHM])
 
 
+_decoded_tokens = TTLCache(get_settings().auth_token_cache_size, ttl=0)
+
+
+def decode_access_token_cached(token: str) -> dict[str, Any]:
+    # Signature checks run once per token; entries live until the token's own expiry.
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _decoded_tokens.get(key)
+    if payload is not None:
+        metrics.incr("auth.token.hit")
+        return payload
+    metrics.incr("auth.token.miss")
+    payload = decode_access_token(token)
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _decoded_tokens.set(key, payload, ttl=exp - time.time())
+    return payload
+
+
 def hash_otp(email: str, code: str) -> str:
     settings = get_settings()
     raw = f"{email.lower()}::{code}::{settings.app_secret_key}"
@@ -0,0 +1,160 @@
+import logging
+from collections.abc import Callable
+
+from sqlalchemy import Connection, Engine, Index, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from app.db.base import Base
+from app.db.models import UsageLedger, UsageMonthly
+
+
+# create_all only creates missing tables. Columns and indexes added to tables that already exist are
+# applied here, in order, after create_all. Each step looks at the live schema first, so on a new
+# database (or one that is already upgraded) nothing runs.
+logger = logging.getLogger(__name__)
+
+# A step returns what it changed, or None when the schema already had it.
+UpgradeStep = Callable[[Connection], str | None]
+# Constant defaults for NOT NULL columns added to existing rows (SQLite rejects CURRENT_TIMESTAMP there).
+EPOCH = "'1970-01-01 00:00:00'"
+
+
+def add_column(table: str, name: str, default: str | None = None) -> UpgradeStep:
+    # `default` is an SQL literal filled into existing rows; NOT NULL columns need one.
+    def step(conn: Connection) -> str | None:
+        if name in {c["name"] for c in inspect(conn).get_columns(table)}:
+            return None
+        ddl = str(CreateColumn(Base.metadata.tables[table].c[name]).compile(dialect=conn.dialect))
+        if default is not None:
+            ddl += f" DEFAULT {default}"
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+        return f"added column {table}.{name}"
+
+    return step
+
+
+def _existing_indexes(conn: Connection, table: str) -> set[str]:
+    inspector = inspect(conn)
+    return {i["name"] for i in inspector.get_indexes(table)} | {u["name"] for u in inspector.get_unique_constraints(table)}
+
+
+def create_index(table: str, name: str) -> UpgradeStep:
+    # Creates an index declared on the model (index=True columns and __table_args__ alike).
+    def step(conn: Connection) -> str | None:
+        if name in _existing_indexes(conn, table):
+            return None
+        next(i for i in Base.metadata.tables[table].indexes if i.name == name).create(conn)
+        return f"created index {name}"
+
+    return step
+
+
+def drop_index(table: str, name: str) -> UpgradeStep:
+    # For an index the model no longer declares because a newer one covers it.
+    def step(conn: Connection) -> str | None:
+        if name not in {i["name"] for i in inspect(conn).get_indexes(table)}:
+            return None
+        conn.execute(text(f"DROP INDEX {conn.dialect.identifier_preparer.quote(name)}"))
+        return f"dropped index {name}"
+
+    return step
+
+
+def create_unique_index(table: str, name: str) -> UpgradeStep:
+    # A UniqueConstraint declared on the model, added to an existing table as a unique index. Rows that
+    # already break it are left alone and the index is skipped; the code using it must cope without.
+    def step(conn: Connection) -> str | None:
+        if name in _existing_indexes(conn, table):
+            return None
+        constraint = next(c for c in Base.metadata.tables[table].constraints if c.name == name)
+        try:
+            with conn.begin_nested():
+                Index(name, *constraint.columns, unique=True).create(conn)
+        except IntegrityError:
+            logger.warning("schema upgrade: %s has rows violating %s, index not created", table, name)
+            return None
+        return f"created unique index {name}"
+
+    return step
+
+
+def backfill_usage_rollups(conn: Connection) -> str | None:
+    # usage_monthly is created empty next to an existing ledger, and billing /me reads only the rollup.
+    if conn.execute(select(UsageMonthly.id).limit(1)).first() or not conn.execute(select(UsageLedger.id).limit(1)).first():
+        return None
+    from app.services.billing_service import reconcile_usage
+
+    with Session(bind=conn) as db:
+        result = reconcile_usage(db)
+    return f"backfilled {result['rollups']} usage_monthly rollups from usage_ledger"
+
+
+def rebuild_project_snapshots(conn: Connection) -> str | None:
+    # Snapshots used to hold only the detail JSON as text; they now hold the whole response body. The table
+    # is derived, so it is recreated and refilled from the live project tables.
+    if "body" in {c["name"] for c in inspect(conn).get_columns("project_snapshots")}:
+        return None
+    table = Base.metadata.tables["project_snapshots"]
+    table.drop(conn)
+    table.create(conn)
+    from app.services.snapshot_service import check_snapshots
+
+    with Session(bind=conn) as db:
+        result = check_snapshots(db, fix=True)
+    return f"rebuilt {len(result['missing'])} project_snapshots rows"
+
+
+SCHEMA_UPGRADES: list[UpgradeStep] = [
+    # Task queue: retries, backoff and worker leases.
+    add_column("async_tasks", "payload_json"),
+    add_column("async_tasks", "attempts", "0"),
+    add_column("async_tasks", "max_attempts", "3"),
+    add_column("async_tasks", "run_after", EPOCH),
+    add_column("async_tasks", "locked_by"),
+    add_column("async_tasks", "lease_expires_at"),
+    create_index("async_tasks", "ix_async_tasks_claim"),
+    # Per-project token index.
+    add_column("resume_projects", "token_index"),
+    # Memoization digests for parse, score and JD analysis.
+    add_column("resume_projects", "source_digest"),
+    add_column("resume_projects", "parse_digest"),
+    add_column("resume_scores", "input_digest"),
+    add_column("jd_profiles", "input_digest"),
+    # Incremental rewrite.
+    add_column("resume_sections", "rewrite_fingerprint"),
+    # Content-addressed exports.
+    add_column("export_files", "content_hash"),
+    add_column("export_files", "template"),
+    create_index("export_files", "ix_export_files_content_hash"),
+    create_unique_index("export_files", "uq_export_files_project_hash_format"),
+    # OTP lookups.
+    create_index("auth_otps", "ix_auth_otps_email_unused"),
+    # Billing rollup (the table itself comes from create_all).
+    backfill_usage_rollups,
+    # ETag validators.
+    add_column("resume_projects", "content_version", "0"),
+    add_column("plans", "updated_at", EPOCH),
+    # Keyset pagination of GET /projects; (user_id, id) replaces the user_id index.
+    create_index("resume_projects", "ix_resume_projects_user_id_id"),
+    drop_index("resume_projects", "ix_resume_projects_user_id"),
+    # Principal cache invalidation.
+    create_index("users", "ix_users_updated_at"),
+    # Project snapshots store the complete response body.
+    rebuild_project_snapshots,
+    # Export retention by last use; existing rows keep their id order.
+    add_column("export_files", "last_used_at", EPOCH),
+]
+
+
+def upgrade_schema(engine: Engine) -> list[str]:
+    # One transaction per step, so a failing step leaves the earlier ones applied.
+    applied = []
+    for step in SCHEMA_UPGRADES:
+        with engine.begin() as conn:
+            change = step(conn)
+        if change:
+            logger.info("schema upgrade: %s", change)
+            applied.append(change)
+    return applied
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, SmallInteger, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, LargeBinary, SmallInteger, String, Text, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -14,11 +14,22 @@ class User(Base):
     display_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     status: Mapped[int] = mapped_column(SmallInteger, default=1, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Indexed for the principal cache invalidation check in services/auth_service.py.
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
 
 class AuthOtp(Base):
     __tablename__ = "auth_otps"
+    # Serves verify_otp: latest unused code of an email, read from the index alone.
+    __table_args__ = (
+        Index(
+            "ix_auth_otps_email_unused",
+            "email",
+            "id",
+            sqlite_where=text("used_at IS NULL"),
+            postgresql_where=text("used_at IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     email: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
@@ -30,9 +41,11 @@ class AuthOtp(Base):
 
 class ResumeProject(Base):
     __tablename__ = "resume_projects"
+    # Also serves plain user_id lookups; keyset pages of GET /projects walk it by id.
+    __table_args__ = (Index("ix_resume_projects_user_id_id", "user_id", "id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     target_role: Mapped[str] = mapped_column(String(100), nullable=False)
     target_city: Mapped[str | None] = mapped_column(String(100), nullable=True)
@@ -40,7 +53,11 @@ class ResumeProject(Base):
     source_type: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # 1=file, 2=text
     source_file_url: Mapped[str | None] = mapped_column(Text, nullable=True)
     source_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    source_digest: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    parse_digest: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    token_index: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)  # see services/text_index.py
     parse_status: Mapped[int] = mapped_column(SmallInteger, default=0, nullable=False)  # 0=pending,1=done,2=failed
+    content_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # bumped by project_service.touch_project
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -58,6 +75,7 @@ class ResumeSection(Base):
     optimized_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     sort_order: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     is_accepted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    rewrite_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -74,6 +92,7 @@ class ResumeScore(Base):
     completeness_score: Mapped[int] = mapped_column(SmallInteger, nullable=False)
     match_score: Mapped[int] = mapped_column(SmallInteger, nullable=False)
     issues_json: Mapped[str] = mapped_column(Text, nullable=False)
+    input_digest: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
 
@@ -85,31 +104,67 @@ class JdProfile(Base):
     jd_text: Mapped[str] = mapped_column(Text, nullable=False)
     keywords_json: Mapped[str] = mapped_column(Text, nullable=False)
     missing_keywords_json: Mapped[str] = mapped_column(Text, nullable=False)
+    input_digest: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
 
+class ProjectSnapshot(Base):
+    # Pre-serialised GET /projects/{id} response body (envelope included), rebuilt by services/snapshot_service.py whenever the project is touched.
+    __tablename__ = "project_snapshots"
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("resume_projects.id"), primary_key=True)
+    content_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class ProjectTerm(Base):
+    # Inverted index over parsed resume text: one row per (project, index term), rebuilt by
+    # services/term_index_service.py on every parse. The lookup index covers the ranking query.
+    __tablename__ = "project_terms"
+    __table_args__ = (Index("ix_project_terms_user_term", "user_id", "term", "project_id", "tf"),)
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("resume_projects.id"), primary_key=True)
+    term: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    tf: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
 class AsyncTask(Base):
     __tablename__ = "async_tasks"
+    __table_args__ = (Index("ix_async_tasks_claim", "status", "task_type", "run_after"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
     project_id: Mapped[int | None] = mapped_column(ForeignKey("resume_projects.id"), nullable=True, index=True)
     task_type: Mapped[str] = mapped_column(String(32), nullable=False)
     status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")  # queued/running/done/failed
+    payload_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
     result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(SmallInteger, default=3, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
 class ExportFile(Base):
     __tablename__ = "export_files"
+    # One row per rendered file: the file path is derived from the project and content hash.
+    __table_args__ = (UniqueConstraint("project_id", "content_hash", "format", name="uq_export_files_project_hash_format"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("resume_projects.id"), nullable=False, index=True)
     format: Mapped[str] = mapped_column(String(16), nullable=False)
     file_path: Mapped[str] = mapped_column(Text, nullable=False)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    template: Mapped[str | None] = mapped_column(String(50), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set again whenever an export request is served by this file; retention keeps the most recently used.
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
 
 class Plan(Base):
@@ -121,6 +176,7 @@ class Plan(Base):
     price_cents: Mapped[int] = mapped_column(Integer, nullable=False)
     quota_per_month: Mapped[int] = mapped_column(Integer, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
 class Subscription(Base):
@@ -145,3 +201,14 @@ class UsageLedger(Base):
     used_units: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
 
+
+class UsageMonthly(Base):
+    # Rollup of usage_ledger per user and calendar month (UTC), kept in step by billing_service.record_usage.
+    __tablename__ = "usage_monthly"
+    __table_args__ = (UniqueConstraint("user_id", "month", name="uq_usage_monthly_user_month"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    month: Mapped[str] = mapped_column(String(7), nullable=False)
+    used_units: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
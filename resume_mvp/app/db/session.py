@@ -1,23 +1,148 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
 from app.db.base import Base
+from app.db.pool import TimedAsyncQueuePool, TimedQueuePool, pool_status
 
 
 settings = get_settings()
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
-)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, class_=Session)
 
 
-def init_db() -> None:
-    # Import models before create_all to register metadata.
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    # Backend profile: pool sizing for anything with a real connection pool, plus
+    # SQLite pragmas (see _apply_sqlite_pragmas) or a server-side statement timeout on PostgreSQL.
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options: dict = {}
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    elif backend == "postgresql" and settings.db_statement_timeout_ms:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    if not _is_memory_sqlite(parsed):
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+        )
+        if backend != "sqlite":
+            options.update(pool_pre_ping=settings.db_pool_pre_ping, pool_recycle=settings.db_pool_recycle_seconds)
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_conn, connection_record) -> None:
+    # WAL lets readers run next to the single writer; busy_timeout makes writers from other
+    # processes wait for the lock instead of failing with "database is locked".
+    cursor = dbapi_conn.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    cursor.close()
+
+
+def _configure_engine(sync_engine: Engine) -> None:
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+    event.listen(sync_engine, "before_cursor_execute", _count_statement)
+    event.listen(sync_engine, "commit", _count_commit)
+
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+# Objects stay readable after commit, so returning a freshly written row does not cost a refresh SELECT.
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False, class_=Session)
+
+
+@dataclass
+class DbCallStats:
+    statements: int = 0
+    commits: int = 0
+
+
+_db_call_stats: ContextVar[DbCallStats | None] = ContextVar("db_call_stats", default=None)
+
+
+def track_db_calls() -> DbCallStats:
+    # Start counting round-trips for the current request/task; the returned object is updated in place.
+    stats = DbCallStats()
+    _db_call_stats.set(stats)
+    return stats
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _db_call_stats.get()
+    if stats is not None:
+        stats.statements += 1
+
+
+def _count_commit(conn):
+    stats = _db_call_stats.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+_configure_engine(engine)
+
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+
+def async_database_url(url: str) -> str:
+    # Same database as the sync engine, reached through the asyncio driver of its backend.
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"no async driver configured for {backend}")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    # Created on first use, so the async drivers are only needed when async_db_enabled is set.
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        url = settings.async_database_url or async_database_url(settings.database_url)
+        _async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        _configure_engine(_async_engine.sync_engine)
+        _async_sessionmaker = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+def pool_stats() -> dict:
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(_async_engine.pool) if _async_engine is not None else None,
+    }
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine, _async_sessionmaker = None, None
+
+
+def init_db() -> list[str]:
+    # Import models before create_all to register metadata. Returns the upgrades applied to existing tables.
     from app.db import models  # noqa: F401
+    from app.db.migrations import upgrade_schema
 
     Base.metadata.create_all(bind=engine)
+    return upgrade_schema(engine)
 
 
 def get_db():
@@ -27,3 +152,7 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
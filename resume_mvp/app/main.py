@@ -1,18 +1,40 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
 
+from app.api.body_limit import BodySizeLimitMiddleware
 from app.api.router import api_router
 from app.core.config import get_settings
 from app.db.models import Plan
-from app.db.session import SessionLocal, init_db
+from app.db.session import SessionLocal, dispose_async_engine, init_db, track_db_calls
+from app.services.extract_service import shutdown_extract_pool
 from app.services.project_service import ensure_storage_dirs
 
 
 settings = get_settings()
-app = FastAPI(title=settings.app_name, debug=settings.app_debug)
+app = FastAPI(title=settings.app_name, debug=settings.app_debug, default_response_class=ORJSONResponse)
 app.include_router(api_router)
 
 
+@app.middleware("http")
+async def db_call_stats(request: Request, call_next):
+    stats = track_db_calls()
+    response = await call_next(request)
+    if settings.app_debug:
+        response.headers["X-DB-Statements"] = str(stats.statements)
+        response.headers["X-DB-Commits"] = str(stats.commits)
+    return response
+
+
+# Added last so it wraps the other middleware. Multipart framing adds a little on top of the file itself.
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=settings.max_upload_bytes + _MULTIPART_OVERHEAD_BYTES,
+    path_limits={"/api/v1/projects/import": settings.import_max_upload_bytes + _MULTIPART_OVERHEAD_BYTES},
+)
+
+
 @app.get("/healthz")
 def healthz():
     return {"status": "ok"}
@@ -25,6 +47,12 @@ def startup():
     seed_plans()
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    shutdown_extract_pool()
+    await dispose_async_engine()
+
+
 def seed_plans() -> None:
     db = SessionLocal()
     try:
@@ -1,11 +1,16 @@
 from pydantic import BaseModel, Field
 
 
+BATCH_PROJECT_LIMIT = 200
+RANK_TOP_K_LIMIT = 100
+
+
 class CreateProjectTextIn(BaseModel):
     title: str = Field(min_length=1, max_length=200)
     target_role: str = Field(min_length=1, max_length=100)
-    target_city: str | None = None
-    years_experience: int | None = None
+    # Bounded by the resume_projects columns (VARCHAR(100), SMALLINT).
+    target_city: str | None = Field(default=None, max_length=100)
+    years_experience: int | None = Field(default=None, ge=0, le=100)
     source_text: str = Field(min_length=1)
 
 
@@ -13,11 +18,26 @@ class AnalyzeJdIn(BaseModel):
     jd_text: str = Field(min_length=1)
 
 
+class RankProjectsIn(BaseModel):
+    jd_text: str = Field(min_length=1)
+    top_k: int = Field(default=20, ge=1, le=RANK_TOP_K_LIMIT)
+
+
 class RewriteIn(BaseModel):
     mode: str = Field(default="balanced")
     use_jd: bool = True
 
 
+class BatchScoreIn(BaseModel):
+    project_ids: list[int] = Field(min_length=1, max_length=BATCH_PROJECT_LIMIT)
+    # Applied to every project before scoring.
+    target_role: str | None = Field(default=None, min_length=1, max_length=100)
+
+
+class BatchRewriteIn(RewriteIn):
+    project_ids: list[int] = Field(min_length=1, max_length=BATCH_PROJECT_LIMIT)
+
+
 class UpdateSectionIn(BaseModel):
     optimized_text: str | None = None
     is_accepted: bool | None = None
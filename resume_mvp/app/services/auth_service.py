@@ -1,20 +1,67 @@
+import threading
+import time
 from datetime import datetime, timedelta
 
-from sqlalchemy import desc, select
+from sqlalchemy import delete, desc, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core import metrics
 from app.core.config import get_settings
 from app.core.security import hash_otp
+from app.core.ttl_cache import TTLCache
 from app.db.models import AuthOtp, User
 
 
+_settings = get_settings()
+# user_id -> (email, display_name) of an active user. Only active users are cached.
+_principals = TTLCache(_settings.auth_principal_cache_size, _settings.auth_principal_cache_ttl_seconds)
+# Any process may change a user (set_user_status stamps updated_at). At most every
+# auth_principal_invalidation_poll_seconds one lookup reads the users updated since the last check and
+# drops them from this process's cache. The window reaches back _INVALIDATION_LAG to cover writes that
+# commit after stamping updated_at and clocks that differ between hosts.
+_INVALIDATION_LAG = timedelta(seconds=10)
+_invalidation_lock = threading.Lock()
+_invalidation_due = 0.0
+_checked_through = datetime.utcnow()
+
+
+class OtpThrottled(ValueError):
+    def __init__(self, retry_after: int):
+        super().__init__("too many otp requests")
+        self.retry_after = retry_after
+
+
+def _otp_retry_after(db: Session, email: str, now: datetime) -> int:
+    # Seconds until `email` may get another code, 0 when it may get one now.
+    settings = get_settings()
+    recent = db.execute(
+        select(AuthOtp.created_at)
+        .where(AuthOtp.email == email, AuthOtp.created_at >= now - timedelta(seconds=settings.otp_send_window_seconds))
+        .order_by(desc(AuthOtp.id))
+        .limit(settings.otp_send_max_per_window)
+    ).scalars().all()
+    if not recent:
+        return 0
+    wait = settings.otp_send_min_interval_seconds - (now - recent[0]).total_seconds()
+    if len(recent) >= settings.otp_send_max_per_window:
+        wait = max(wait, settings.otp_send_window_seconds - (now - recent[-1]).total_seconds())
+    return max(0, int(wait + 0.999))
+
+
 def issue_otp(db: Session, email: str) -> None:
     settings = get_settings()
+    email = email.lower()
+    now = datetime.utcnow()
+    retry_after = _otp_retry_after(db, email, now)
+    if retry_after:
+        raise OtpThrottled(retry_after)
     otp = settings.dev_otp
     record = AuthOtp(
-        email=email.lower(),
+        email=email,
         code_hash=hash_otp(email, otp),
-        expired_at=datetime.utcnow() + timedelta(minutes=10),
+        expired_at=now + timedelta(minutes=settings.otp_ttl_minutes),
+        created_at=now,
     )
     db.add(record)
     db.commit()
@@ -25,6 +72,7 @@ def verify_otp(db: Session, email: str, otp: str) -> bool:
         select(AuthOtp)
         .where(AuthOtp.email == email.lower(), AuthOtp.used_at.is_(None))
         .order_by(desc(AuthOtp.id))
+        .limit(1)
     )
     record = db.execute(stmt).scalars().first()
     if not record:
@@ -38,6 +86,24 @@ def verify_otp(db: Session, email: str, otp: str) -> bool:
     return True
 
 
+def purge_otps(db: Session, batch_size: int | None = None) -> int:
+    # Rows stay until they are expired and older than the throttle window (they are counted there).
+    # Deleted in short id batches, each its own transaction, so sends and logins never wait long.
+    settings = get_settings()
+    batch_size = batch_size or settings.otp_purge_batch_size
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.otp_send_window_seconds)
+    purged = 0
+    while True:
+        ids = db.execute(
+            select(AuthOtp.id).where(AuthOtp.expired_at < cutoff).order_by(AuthOtp.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return purged
+        db.execute(delete(AuthOtp).where(AuthOtp.id.in_(ids)))
+        db.commit()
+        purged += len(ids)
+
+
 def get_or_create_user(db: Session, email: str) -> User:
     stmt = select(User).where(User.email == email.lower())
     user = db.execute(stmt).scalars().first()
@@ -46,6 +112,86 @@ def get_or_create_user(db: Session, email: str) -> User:
     user = User(email=email.lower())
     db.add(user)
     db.commit()
-    db.refresh(user)
     return user
 
+
+def _invalidation_window() -> tuple[datetime, datetime] | None:
+    # (since, now) when this caller should check for updated users, None when a check is not due.
+    global _invalidation_due
+    now = time.monotonic()
+    if now < _invalidation_due:
+        return None
+    with _invalidation_lock:
+        if now < _invalidation_due:
+            return None
+        _invalidation_due = now + _settings.auth_principal_invalidation_poll_seconds
+        return _checked_through - _INVALIDATION_LAG, datetime.utcnow()
+
+
+def _updated_users_stmt(since: datetime):
+    return select(User.id).where(User.updated_at > since)
+
+
+def _invalidate(user_ids: list[int], checked_at: datetime) -> None:
+    # Only reached after the query succeeded, so a failed check is covered by the next one.
+    global _checked_through
+    for user_id in user_ids:
+        _principals.pop(user_id)
+    metrics.incr("auth.principal.invalidated", len(user_ids))
+    with _invalidation_lock:
+        _checked_through = max(_checked_through, checked_at)
+
+
+def _principal(user_id: int, email: str, display_name: str | None) -> User:
+    # Detached stand-in for the request: carries what endpoints read, never bound to a session.
+    return User(id=user_id, email=email, display_name=display_name, status=1)
+
+
+def _active_user_stmt(user_id: int):
+    return select(User.email, User.display_name).where(User.id == user_id, User.status == 1)
+
+
+def _cached_principal(user_id: int) -> User | None:
+    cached = _principals.get(user_id)
+    if cached is None:
+        metrics.incr("auth.principal.miss")
+        return None
+    metrics.incr("auth.principal.hit")
+    return _principal(user_id, *cached)
+
+
+def _remember_principal(user_id: int, row) -> User | None:
+    if row is None:
+        return None
+    _principals.set(user_id, (row.email, row.display_name))
+    return _principal(user_id, row.email, row.display_name)
+
+
+def resolve_principal(db: Session, user_id: int) -> User | None:
+    if window := _invalidation_window():
+        _invalidate(db.execute(_updated_users_stmt(window[0])).scalars().all(), window[1])
+    principal = _cached_principal(user_id)
+    if principal is not None:
+        return principal
+    return _remember_principal(user_id, db.execute(_active_user_stmt(user_id)).first())
+
+
+async def resolve_principal_async(db: AsyncSession, user_id: int) -> User | None:
+    if window := _invalidation_window():
+        _invalidate((await db.execute(_updated_users_stmt(window[0]))).scalars().all(), window[1])
+    principal = _cached_principal(user_id)
+    if principal is not None:
+        return principal
+    return _remember_principal(user_id, (await db.execute(_active_user_stmt(user_id))).first())
+
+
+def principal_from_claims(claims: dict) -> User | None:
+    if "email" not in claims:
+        return None
+    return _principal(int(claims["sub"]), claims["email"], claims.get("name"))
+
+
+def set_user_status(db: Session, user_id: int, status: int) -> bool:
+    changed = db.execute(update(User).where(User.id == user_id).values(status=status, updated_at=datetime.utcnow())).rowcount
+    db.commit()
+    return bool(changed)
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from sqlalchemy import delete, desc, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import Plan, Subscription, UsageLedger, UsageMonthly
+
+
+FREE_PLAN_CODE = "FREE"
+FREE_QUOTA_PER_MONTH = 3
+
+
+def usage_month(at: datetime) -> str:
+    return at.strftime("%Y-%m")
+
+
+def _upsert_monthly(db: Session, user_id: int, month: str, units: int, replace: bool = False) -> None:
+    upsert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = upsert(UsageMonthly).values(user_id=user_id, month=month, used_units=units, updated_at=datetime.utcnow())
+    used_units = stmt.excluded.used_units if replace else UsageMonthly.used_units + stmt.excluded.used_units
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UsageMonthly.user_id, UsageMonthly.month],
+            set_={"used_units": used_units, "updated_at": stmt.excluded.updated_at},
+        )
+    )
+
+
+def record_usage(db: Session, user_id: int, project_id: int | None, action_type: int, used_units: int = 1) -> None:
+    # Ledger row and rollup increment go into the caller's transaction together.
+    now = datetime.utcnow()
+    db.add(UsageLedger(user_id=user_id, project_id=project_id, action_type=action_type, used_units=used_units, created_at=now))
+    _upsert_monthly(db, user_id, usage_month(now), used_units)
+
+
+def record_usage_many(db: Session, user_id: int, project_ids: list[int], action_type: int) -> None:
+    # One unit per project: the ledger rows go out as one executemany INSERT and the rollup gets a single upsert.
+    if not project_ids:
+        return
+    now = datetime.utcnow()
+    db.execute(
+        insert(UsageLedger),
+        [{"user_id": user_id, "project_id": project_id, "action_type": action_type, "used_units": 1, "created_at": now} for project_id in project_ids],
+    )
+    _upsert_monthly(db, user_id, usage_month(now), len(project_ids))
+
+
+def billing_summary(db: Session, user_id: int) -> dict:
+    now = datetime.utcnow()
+    latest = db.execute(
+        select(Subscription.status, Subscription.end_at, Plan.plan_code, Plan.quota_per_month)
+        .outerjoin(Plan, Plan.id == Subscription.plan_id)
+        .where(Subscription.user_id == user_id)
+        .order_by(desc(Subscription.id))
+        .limit(1)
+    ).first()
+    used = db.execute(
+        select(UsageMonthly.used_units).where(UsageMonthly.user_id == user_id, UsageMonthly.month == usage_month(now))
+    ).scalar() or 0
+
+    quota = FREE_QUOTA_PER_MONTH
+    plan_code = FREE_PLAN_CODE
+    if latest and latest.status == 1 and latest.end_at > now and latest.plan_code:
+        quota = latest.quota_per_month
+        plan_code = latest.plan_code
+    return {"plan_code": plan_code, "quota_per_month": quota, "used_this_month": used, "remaining": max(0, quota - used)}
+
+
+def _ledger_month(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(UsageLedger.created_at, "YYYY-MM")
+    return func.strftime("%Y-%m", UsageLedger.created_at)
+
+
+def reconcile_usage(db: Session, fix: bool = True) -> dict:
+    # Recompute every rollup from the ledger, report where they disagree and, unless fix is False, overwrite them.
+    month = _ledger_month(db)
+    expected = {
+        (row.user_id, row.month): int(row.units)
+        for row in db.execute(
+            select(UsageLedger.user_id, month.label("month"), func.sum(UsageLedger.used_units).label("units"))
+            .group_by(UsageLedger.user_id, month)
+        )
+    }
+    actual = {
+        (row.user_id, row.month): (row.id, row.used_units)
+        for row in db.execute(select(UsageMonthly.id, UsageMonthly.user_id, UsageMonthly.month, UsageMonthly.used_units))
+    }
+    drift = []
+    for key in sorted(expected.keys() | actual.keys()):
+        ledger_units = expected.get(key, 0)
+        rollup_units = actual[key][1] if key in actual else None
+        if rollup_units != ledger_units:
+            drift.append({"user_id": key[0], "month": key[1], "ledger": ledger_units, "rollup": rollup_units})
+
+    if fix and drift:
+        stale_ids = [actual[k][0] for k in actual.keys() - expected.keys()]
+        if stale_ids:
+            db.execute(delete(UsageMonthly).where(UsageMonthly.id.in_(stale_ids)))
+        for item in drift:
+            if item["ledger"]:
+                _upsert_monthly(db, item["user_id"], item["month"], item["ledger"], replace=True)
+        db.commit()
+    return {"rollups": len(expected), "drift": drift, "fixed": fix and bool(drift)}
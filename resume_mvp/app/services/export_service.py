@@ -1,28 +1,42 @@
+import hashlib
+import json
 import os
 import re
+import time
 from datetime import datetime
 
 from fpdf import FPDF
-from sqlalchemy import select
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from app.core import metrics
 from app.core.config import get_settings
 from app.db.models import ExportFile, ResumeProject, ResumeSection
 
 
+# Bump when rendering changes so identical inputs produce a new file instead of reusing an old one.
+EXPORT_RENDER_VERSION = "pdf-1"
+
+
 def _safe_pdf_text(text: str) -> str:
     # Keep export stable even when there are unsupported font glyphs.
     return re.sub(r"[^\x00-\x7F]+", "?", text)
 
 
-def export_project_to_pdf(db: Session, project: ResumeProject) -> ExportFile:
-    sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id).order_by(ResumeSection.sort_order)).scalars().all()
-    settings = get_settings()
-    export_dir = os.path.join(settings.storage_dir, "exports")
-    os.makedirs(export_dir, exist_ok=True)
-    filename = f"resume_{project.id}_{int(datetime.utcnow().timestamp())}.pdf"
-    file_path = os.path.join(export_dir, filename)
+def export_content_hash(project: ResumeProject, sections: list[ResumeSection], template: str) -> str:
+    payload = {
+        "version": EXPORT_RENDER_VERSION,
+        "template": template,
+        "title": project.title,
+        "target_role": project.target_role,
+        "sections": [[s.section_type, s.optimized_text or s.origin_text] for s in sections],
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")).hexdigest()
+
 
+def _render_pdf(project: ResumeProject, sections: list[ResumeSection], file_path: str) -> None:
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=12)
     pdf.add_page()
@@ -38,12 +52,113 @@ def export_project_to_pdf(db: Session, project: ResumeProject) -> ExportFile:
         pdf.set_font("Helvetica", "", 10)
         final_text = sec.optimized_text or sec.origin_text
         for line in final_text.splitlines():
-            pdf.multi_cell(0, 6, _safe_pdf_text(line))
+            # Return to the left margin, otherwise the next full-width cell has no room left.
+            pdf.multi_cell(0, 6, _safe_pdf_text(line), new_x="LMARGIN", new_y="NEXT")
 
-    pdf.output(file_path)
-    record = ExportFile(project_id=project.id, format="pdf", file_path=file_path)
-    db.add(record)
-    db.commit()
-    db.refresh(record)
+    # Write next to the target and rename, so a crash never leaves a truncated file under the final name.
+    tmp_path = f"{file_path}.tmp{os.getpid()}"
+    pdf.output(tmp_path)
+    os.replace(tmp_path, file_path)
+
+
+def _find_export(db: Session, project_id: int, content_hash: str) -> ExportFile | None:
+    return db.execute(
+        select(ExportFile)
+        .where(ExportFile.project_id == project_id, ExportFile.content_hash == content_hash, ExportFile.format == "pdf")
+        .order_by(ExportFile.id.desc())
+    ).scalars().first()
+
+
+def export_project_to_pdf(db: Session, project: ResumeProject, template: str = "ats_default") -> ExportFile:
+    sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id).order_by(ResumeSection.sort_order)).scalars().all()
+    content_hash = export_content_hash(project, sections, template)
+    existing = _find_export(db, project.id, content_hash)
+    if existing and os.path.exists(existing.file_path):
+        metrics.incr("memo.export.hit")
+        existing.last_used_at = datetime.utcnow()
+        return existing
+    metrics.incr("memo.export.miss")
+
+    settings = get_settings()
+    export_dir = os.path.join(settings.storage_dir, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    file_path = os.path.join(export_dir, f"resume_{project.id}_{content_hash[:24]}.pdf")
+    _render_pdf(project, sections, file_path)
+
+    if existing:
+        # Row survived but its file did not: re-render in place.
+        record = existing
+    else:
+        # A concurrent identical export may have inserted the row meanwhile (same file, rendered the same
+        # way); both end up on that row. No conflict target, so databases predating the unique constraint still work.
+        upsert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        db.execute(
+            upsert(ExportFile)
+            .values(project_id=project.id, format="pdf", file_path=file_path, content_hash=content_hash, template=template)
+            .on_conflict_do_nothing()
+        )
+        record = _find_export(db, project.id, content_hash)
+    record.last_used_at = datetime.utcnow()
+    db.flush()
+    prune_project_exports(db, project.id, settings.export_retention_per_project)
     return record
 
+
+def remove_files_after_commit(db: Session, paths: list[str]) -> None:
+    # Deleting files is not transactional; wait until the rows that point at them are gone for good.
+    db.info.setdefault("remove_after_commit", []).extend(paths)
+
+
+@event.listens_for(Session, "after_commit")
+def _remove_pending_files(session: Session) -> None:
+    for path in session.info.pop("remove_after_commit", []):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_files(session: Session) -> None:
+    session.info.pop("remove_after_commit", None)
+
+
+def prune_project_exports(db: Session, project_id: int, keep: int) -> int:
+    # Keep the `keep` most recently used exports of a project; the rest are superseded.
+    stale = db.execute(
+        select(ExportFile.id, ExportFile.file_path)
+        .where(ExportFile.project_id == project_id)
+        .order_by(ExportFile.last_used_at.desc(), ExportFile.id.desc())
+        .offset(keep)
+    ).all()
+    if not stale:
+        return 0
+    db.execute(delete(ExportFile).where(ExportFile.id.in_([row.id for row in stale])))
+    # Rows from before the unique constraint can share a file with a newer row that is kept.
+    paths = {row.file_path for row in stale}
+    still_used = set(db.execute(select(ExportFile.file_path).where(ExportFile.file_path.in_(paths))).scalars())
+    remove_files_after_commit(db, sorted(paths - still_used))
+    return len(stale)
+
+
+def gc_exports(db: Session, keep: int, orphan_min_age_seconds: int = 3600) -> dict:
+    # Retention for all projects, then delete files under exports/ that no row references any more
+    # (left behind by crashes). Recent files are skipped: their row may not be committed yet.
+    project_ids = db.execute(
+        select(ExportFile.project_id).group_by(ExportFile.project_id).having(func.count(ExportFile.id) > keep)
+    ).scalars().all()
+    pruned = 0
+    for project_id in project_ids:
+        pruned += prune_project_exports(db, project_id, keep)
+        db.commit()
+
+    export_dir = os.path.join(get_settings().storage_dir, "exports")
+    known = {os.path.abspath(p) for p in db.execute(select(ExportFile.file_path)).scalars()}
+    cutoff = time.time() - orphan_min_age_seconds
+    orphans = 0
+    if os.path.isdir(export_dir):
+        for entry in os.scandir(export_dir):
+            if entry.is_file() and os.path.abspath(entry.path) not in known and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                orphans += 1
+    return {"pruned_rows": pruned, "orphan_files": orphans}
@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+from app.core import metrics
+from app.core.config import get_settings
+
+
+# Kept free of DB/ORM imports: worker processes are spawned and import this module on their own.
+logger = logging.getLogger(__name__)
+
+# Bump when extraction output changes so cached texts are not reused.
+EXTRACT_ENGINE_VERSION = "extract-1"
+SUPPORTED_EXTENSIONS = (".txt", ".pdf", ".docx")
+_DOCX_MAX_XML_BYTES = 50 * 1024 * 1024
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class ExtractionError(ValueError):
+    pass
+
+
+# (text, complete): complete is False when the time budget cut extraction short. The page cap is not
+# counted as incomplete since it cuts the same file at the same place every time.
+Extracted = tuple[str, bool]
+
+
+def _extract_pdf(file_path: str, max_pages: int, deadline: float) -> Extracted:
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    parts: list[str] = []
+    for i, page in enumerate(reader.pages):
+        if i >= max_pages:
+            break
+        if time.monotonic() > deadline:
+            return "\n".join(parts), False
+        parts.append(page.extract_text() or "")
+    return "\n".join(parts), True
+
+
+def _extract_docx(file_path: str, deadline: float) -> Extracted:
+    with zipfile.ZipFile(file_path) as zf:
+        try:
+            info = zf.getinfo("word/document.xml")
+        except KeyError:
+            raise ExtractionError("not a docx document")
+        if info.file_size > _DOCX_MAX_XML_BYTES:
+            raise ExtractionError("docx document is too large")
+        paragraphs: list[str] = []
+        buf: list[str] = []
+        with zf.open(info) as xml:
+            for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    if tag == f"{_W}tab":
+                        buf.append("\t")
+                    elif tag in (f"{_W}br", f"{_W}cr"):
+                        buf.append("\n")
+                    continue
+                if tag == f"{_W}t":
+                    buf.append(elem.text or "")
+                elif tag == f"{_W}p":
+                    paragraphs.append("".join(buf))
+                    buf = []
+                    elem.clear()
+                    if time.monotonic() > deadline:
+                        return "\n".join(paragraphs), False
+        return "\n".join(paragraphs), True
+
+
+def _extract_in_worker(file_path: str, ext: str, max_pages: int, time_budget: float) -> Extracted:
+    deadline = time.monotonic() + time_budget
+    if ext == ".pdf":
+        return _extract_pdf(file_path, max_pages, deadline)
+    return _extract_docx(file_path, deadline)
+
+
+_pool: ProcessPoolExecutor | None = None
+# Worker processes of _pool, so a stuck one can be terminated.
+_pool_processes: list[multiprocessing.process.BaseProcess] = []
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the API process runs threads, forking it is not safe.
+            _pool = ProcessPoolExecutor(max_workers=get_settings().extract_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_extract_pool(kill: bool = False) -> None:
+    global _pool, _pool_processes
+    with _pool_lock:
+        pool, processes, _pool, _pool_processes = _pool, _pool_processes, None, []
+    if pool is None:
+        return
+    if kill:
+        # A worker stuck inside one page ignores the time budget; terminate it instead of waiting.
+        for proc in processes:
+            if proc.is_alive():
+                proc.terminate()
+    pool.shutdown(wait=not kill, cancel_futures=True)
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(content_hash: str) -> str:
+    return os.path.join(get_settings().storage_dir, "extract_cache", f"{content_hash}-{EXTRACT_ENGINE_VERSION}.txt")
+
+
+def _read_text_file(file_path: str) -> str | None:
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _write_cache(cache_path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+
+
+def _document_ext(file_path: str) -> str:
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise ExtractionError(f"unsupported file type: {ext or 'unknown'}")
+    return ext
+
+
+def _submit_extraction(file_path: str, ext: str) -> Future:
+    settings = get_settings()
+    pool = _get_pool()
+    with _pool_lock:
+        # With spawn, the pool starts its workers inside submit(); the children that appear are its own.
+        before = set(multiprocessing.active_children())
+        future = pool.submit(_extract_in_worker, file_path, ext, settings.extract_max_pages, settings.extract_time_budget_seconds)
+        if pool is _pool:
+            _pool_processes.extend(p for p in multiprocessing.active_children() if p not in before)
+    return future
+
+
+def _store_extracted(cache_path: str, file_path: str, extracted: Extracted) -> str:
+    # Text cut short by the time budget depends on how busy the machine was; it is used but not cached.
+    text, complete = extracted
+    if complete:
+        _write_cache(cache_path, text)
+    else:
+        metrics.incr("extract.truncated")
+        logger.warning("extraction of %s ran out of time budget, result not cached", file_path)
+    return text
+
+
+def _extraction_timeout() -> float:
+    # The worker stops between pages once the budget is spent; the grace covers a slow last page.
+    return get_settings().extract_time_budget_seconds + 10
+
+
+def _extraction_error(exc: Exception, file_path: str, ext: str) -> ExtractionError:
+    if isinstance(exc, (FutureTimeoutError, asyncio.TimeoutError)):
+        logger.warning("extraction of %s timed out, restarting the extraction pool", file_path)
+        shutdown_extract_pool(kill=True)
+        return ExtractionError("text extraction timed out")
+    if isinstance(exc, BrokenProcessPool):
+        shutdown_extract_pool(kill=True)
+        return ExtractionError("text extraction worker crashed")
+    if isinstance(exc, ExtractionError):
+        return exc
+    return ExtractionError(f"could not read {ext[1:]} file: {exc}")
+
+
+def extract_document_text(file_path: str, content_hash: str | None = None) -> str:
+    ext = _document_ext(file_path)
+    if ext == ".txt":
+        return _read_text_file(file_path) or ""
+
+    cache_path = _cache_path(content_hash or file_sha256(file_path))
+    cached = _read_text_file(cache_path)
+    if cached is not None:
+        metrics.incr("memo.extract.hit")
+        return cached
+    metrics.incr("memo.extract.miss")
+
+    future = _submit_extraction(file_path, ext)
+    try:
+        extracted = future.result(timeout=_extraction_timeout())
+    except Exception as e:
+        raise _extraction_error(e, file_path, ext)
+    return _store_extracted(cache_path, file_path, extracted)
+
+
+async def extract_document_text_async(file_path: str, content_hash: str | None = None) -> str:
+    # Same contract as extract_document_text, but waits on the pool future from the event loop
+    # instead of holding a threadpool slot for the whole extraction.
+    ext = _document_ext(file_path)
+    if ext == ".txt":
+        return await asyncio.to_thread(_read_text_file, file_path) or ""
+
+    cache_path = _cache_path(content_hash or await asyncio.to_thread(file_sha256, file_path))
+    cached = await asyncio.to_thread(_read_text_file, cache_path)
+    if cached is not None:
+        metrics.incr("memo.extract.hit")
+        return cached
+    metrics.incr("memo.extract.miss")
+
+    future = _submit_extraction(file_path, ext)
+    try:
+        extracted = await asyncio.wait_for(asyncio.wrap_future(future), timeout=_extraction_timeout())
+    except Exception as e:
+        raise _extraction_error(e, file_path, ext)
+    return await asyncio.to_thread(_store_extracted, cache_path, file_path, extracted)
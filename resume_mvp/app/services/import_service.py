@@ -0,0 +1,232 @@
+import json
+import os
+import uuid
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.db.models import ResumeProject
+from app.schemas.project import CreateProjectTextIn
+from app.services.extract_service import SUPPORTED_EXTENSIONS, ExtractionError, extract_document_text
+from app.services.project_service import parse_project, project_values, score_projects
+from app.services.snapshot_service import mark_snapshot_stale
+from app.services.upload_service import safe_filename
+
+
+IMPORT_CHAINS = ("none", "parse", "parse_score")
+IMPORT_ERROR_LIMIT = 100
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def import_kind(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".zip":
+        return "zip"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ImportFormatError("import expects a .zip of resumes or a .jsonl file")
+
+
+# An item is (index, name, values | None, error | None); index counts every entry of the source so a
+# restarted import can skip what an earlier attempt already committed.
+ImportItem = tuple[int, str, dict | None, str | None]
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+def _jsonl_items(path: str, user_id: int, target_role: str | None, skip: int) -> Iterator[ImportItem]:
+    max_line = get_settings().max_upload_bytes
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        index = -1
+        while line := f.readline(max_line + 1):
+            if len(line) > max_line:
+                # Drain the rest of an oversized line without holding it.
+                while line and not line.endswith("\n"):
+                    line = f.readline(max_line)
+                index += 1
+                if index >= skip:
+                    yield index, f"line {index + 1}", None, "line is too large"
+                continue
+            if not line.strip():
+                continue
+            index += 1
+            if index < skip:
+                continue
+            name = f"line {index + 1}"
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("line is not a JSON object")
+                role = record.get("target_role") or target_role
+                # Same rules as POST /projects, so a bad line is reported here instead of failing the batch INSERT.
+                fields = CreateProjectTextIn.model_validate(
+                    {
+                        "title": str(record.get("title") or f"Imported resume {index + 1}")[:200],
+                        "target_role": str(role)[:100] if role else None,
+                        "target_city": record.get("target_city"),
+                        "years_experience": record.get("years_experience"),
+                        "source_text": record.get("source_text"),
+                    }
+                )
+                source_text = fields.source_text.strip()
+                if not source_text:
+                    raise ValueError("source_text is empty")
+                values = project_values(user_id, fields.title, fields.target_role, fields.target_city, fields.years_experience, 2, source_text)
+            except ValidationError as e:
+                yield index, name, None, _validation_message(e)
+                continue
+            except ValueError as e:
+                yield index, name, None, str(e)
+                continue
+            yield index, name, values, None
+
+
+def _unpack_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, dest: str, max_bytes: int) -> None:
+    # Sizes in the central directory can lie; the copy is capped as well.
+    if info.file_size > max_bytes:
+        raise ExtractionError(f"file exceeds {max_bytes} bytes")
+    with zf.open(info) as src, open(dest, "wb") as out:
+        copied = 0
+        while chunk := src.read(get_settings().upload_chunk_bytes):
+            copied += len(chunk)
+            if copied > max_bytes:
+                raise ExtractionError(f"file exceeds {max_bytes} bytes")
+            out.write(chunk)
+
+
+def _zip_member_values(zf: zipfile.ZipFile, info: zipfile.ZipInfo, index: int, dest_dir: str, user_id: int, target_role: str) -> dict:
+    filename = safe_filename(info.filename)
+    dest = os.path.join(dest_dir, f"{index:06d}_{filename}")
+    try:
+        _unpack_member(zf, info, dest, get_settings().max_upload_bytes)
+        source_text = extract_document_text(dest).strip()
+        if not source_text:
+            raise ExtractionError("no text found in file")
+    except BaseException:
+        # No project will point at it: a partial copy or a file without text.
+        try:
+            os.remove(dest)
+        except FileNotFoundError:
+            pass
+        raise
+    title = os.path.splitext(filename)[0][:200] or f"Imported resume {index + 1}"
+    return project_values(user_id, title, target_role, None, None, 1, source_text, dest)
+
+
+def _zip_items(path: str, user_id: int, target_role: str | None, skip: int, unpack_key: str) -> Iterator[ImportItem]:
+    # Members are unpacked one at a time and their text is extracted a few at a time; results come back
+    # in archive order. At most `window` members are in flight, whatever the archive size.
+    if not target_role:
+        raise ImportFormatError("target_role is required for zip imports")
+    settings = get_settings()
+    dest_dir = os.path.join(settings.storage_dir, "uploads", f"import_{unpack_key}")
+    os.makedirs(dest_dir, exist_ok=True)
+    window = max(1, settings.extract_workers) * 2
+    try:
+        zf = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise ImportFormatError("not a zip archive")
+    with zf, ThreadPoolExecutor(max_workers=window) as pool:
+        pending: deque[tuple[int, str, Future]] = deque()
+        index = -1
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            index += 1
+            if index < skip:
+                continue
+            if os.path.splitext(info.filename)[1].lower() not in SUPPORTED_EXTENSIONS:
+                yield index, info.filename, None, "unsupported file type"
+                continue
+            pending.append((index, info.filename, pool.submit(_zip_member_values, zf, info, index, dest_dir, user_id, target_role)))
+            if len(pending) >= window:
+                yield _zip_result(*pending.popleft())
+        while pending:
+            yield _zip_result(*pending.popleft())
+
+
+def _zip_result(index: int, name: str, future: Future) -> ImportItem:
+    try:
+        return index, name, future.result(), None
+    except (ExtractionError, OSError, zipfile.BadZipFile) as e:
+        return index, name, None, str(e)
+
+
+def import_items(path: str, kind: str, user_id: int, target_role: str | None, skip: int = 0, unpack_key: str | None = None) -> Iterator[ImportItem]:
+    if kind == "zip":
+        return _zip_items(path, user_id, target_role[:100] if target_role else None, skip, unpack_key or uuid.uuid4().hex)
+    return _jsonl_items(path, user_id, target_role, skip)
+
+
+def _insert_projects(db: Session, rows: list[dict], chain: str) -> list[ResumeProject]:
+    # One multi-row INSERT ... RETURNING per batch; the order of the returned rows does not matter here.
+    projects = db.scalars(insert(ResumeProject).returning(ResumeProject), rows).all()
+    for project in projects:
+        mark_snapshot_stale(db, project)
+    if chain != "none":
+        for project in projects:
+            parse_project(db, project)
+        if chain == "parse_score":
+            score_projects(db, projects)
+    return projects
+
+
+def import_projects(
+    db: Session,
+    user_id: int,
+    path: str,
+    kind: str,
+    target_role: str | None = None,
+    chain: str = "none",
+    progress: dict | None = None,
+    on_batch: Callable[[dict], None] | None = None,
+    unpack_key: str | None = None,
+) -> dict:
+    # Creates projects in batches of import_batch_size, one commit per batch. `progress` is the state
+    # of an earlier, interrupted run of the same import; on_batch sees the updated state before each
+    # commit so it can be stored in the same transaction. Zip members are unpacked into a directory
+    # named by unpack_key (a fresh one by default): a resumed run passes the same key, and no two
+    # imports share files a failed member may remove.
+    progress = dict(progress or {"processed": 0, "created": 0, "failed": 0, "errors": []})
+    batch_size = get_settings().import_batch_size
+    rows: list[dict] = []
+    errors: list[dict] = []
+
+    def flush_batch(processed: int) -> None:
+        if rows:
+            _insert_projects(db, rows, chain)
+        progress["processed"] = processed
+        progress["created"] += len(rows)
+        progress["failed"] += len(errors)
+        progress["errors"] = (progress["errors"] + errors)[:IMPORT_ERROR_LIMIT]
+        metrics.incr("import.created", len(rows))
+        metrics.incr("import.failed", len(errors))
+        rows.clear()
+        errors.clear()
+        if on_batch:
+            on_batch(progress)
+        db.commit()
+
+    processed = progress["processed"]
+    for index, name, values, error in import_items(path, kind, user_id, target_role, skip=processed, unpack_key=unpack_key):
+        processed = index + 1
+        if error:
+            errors.append({"item": name, "error": error})
+        else:
+            rows.append(values)
+        if len(rows) + len(errors) >= batch_size:
+            flush_batch(processed)
+    flush_batch(processed)
+    return progress
@@ -1,22 +1,34 @@
+import hashlib
 import json
 import os
 import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
+from app.core import metrics
 from app.core.config import get_settings
-from app.db.models import JdProfile, ResumeProject, ResumeScore, ResumeSection, UsageLedger
+from app.db.models import JdProfile, ResumeProject, ResumeScore, ResumeSection
+from app.services.billing_service import record_usage, record_usage_many
+from app.services.scoring import SECTION_MAP, score_values
+from app.services.role_taxonomy import get_taxonomy
+from app.services.snapshot_service import mark_snapshot_stale, sections_by_project
+from app.services.term_index_service import replace_project_terms
+from app.services.extract_service import ExtractionError, extract_document_text, extract_document_text_async
+from app.services.text_index import build_token_index, contains_keyword, dump_token_index, load_token_index, term_counts
 
 
-SECTION_MAP = {
-    "profile": 1,
-    "education": 2,
-    "experience": 3,
-    "project": 4,
-    "skills": 5,
-}
+# Bump when the corresponding stage's output for the same input changes; stored digests then stop matching.
+PARSE_ALGO_VERSION = "parse-1"
+SCORE_ALGO_VERSION = "score-2"
+JD_ALGO_VERSION = "jd-1"
+REWRITE_ALGO_VERSION = "rewrite-1"
+REWRITE_KEYWORD_LIMIT = 5
 
 
 def ensure_storage_dirs() -> None:
@@ -26,6 +38,33 @@ def ensure_storage_dirs() -> None:
     os.makedirs(os.path.join(settings.storage_dir, "exports"), exist_ok=True)
 
 
+def project_values(
+    user_id: int,
+    title: str,
+    target_role: str,
+    target_city: str | None,
+    years_experience: int | None,
+    source_type: int,
+    source_text: str,
+    source_file_url: str | None = None,
+) -> dict:
+    return {
+        "user_id": user_id,
+        "title": title,
+        "target_role": target_role,
+        "target_city": target_city,
+        "years_experience": years_experience,
+        "source_type": source_type,
+        "source_file_url": source_file_url,
+        "source_text": source_text,
+        "source_digest": content_digest(normalize_source_text(source_text)),
+    }
+
+
+def _new_project(*args, **kwargs) -> ResumeProject:
+    return ResumeProject(**project_values(*args, **kwargs))
+
+
 def create_project_from_text(
     db: Session,
     user_id: int,
@@ -35,18 +74,26 @@ def create_project_from_text(
     years_experience: int | None,
     source_text: str,
 ) -> ResumeProject:
-    project = ResumeProject(
-        user_id=user_id,
-        title=title,
-        target_role=target_role,
-        target_city=target_city,
-        years_experience=years_experience,
-        source_type=2,
-        source_text=source_text.strip(),
-    )
+    project = _new_project(user_id, title, target_role, target_city, years_experience, 2, source_text.strip())
     db.add(project)
+    mark_snapshot_stale(db, project)
     db.commit()
-    db.refresh(project)
+    return project
+
+
+async def create_project_from_text_async(
+    db: AsyncSession,
+    user_id: int,
+    title: str,
+    target_role: str,
+    target_city: str | None,
+    years_experience: int | None,
+    source_text: str,
+) -> ResumeProject:
+    project = _new_project(user_id, title, target_role, target_city, years_experience, 2, source_text.strip())
+    db.add(project)
+    mark_snapshot_stale(db.sync_session, project)
+    await db.commit()
     return project
 
 
@@ -57,97 +104,213 @@ def create_project_from_file(
     target_role: str,
     target_city: str | None,
     years_experience: int | None,
-    filename: str,
-    content: bytes,
+    file_path: str,
+    content_hash: str | None = None,
 ) -> ResumeProject:
-    ensure_storage_dirs()
-    safe_name = f"{int(datetime.utcnow().timestamp())}_{filename}"
-    file_path = os.path.join(get_settings().storage_dir, "uploads", safe_name)
-    with open(file_path, "wb") as f:
-        f.write(content)
-
-    source_text = extract_text_from_file(file_path)
-    project = ResumeProject(
-        user_id=user_id,
-        title=title,
-        target_role=target_role,
-        target_city=target_city,
-        years_experience=years_experience,
-        source_type=1,
-        source_file_url=file_path,
-        source_text=source_text,
-    )
+    # The upload is already on disk (see upload_service.store_upload).
+    source_text = extract_document_text(file_path, content_hash).strip()
+    if not source_text:
+        raise ExtractionError("no text found in file")
+    project = _new_project(user_id, title, target_role, target_city, years_experience, 1, source_text, file_path)
     db.add(project)
+    mark_snapshot_stale(db, project)
     db.commit()
-    db.refresh(project)
     return project
 
 
-def extract_text_from_file(file_path: str) -> str:
-    # MVP fallback parser:
-    # - txt: read directly
-    # - docx/pdf: currently fall back to file-name marker, to keep service runnable
-    lower = file_path.lower()
-    if lower.endswith(".txt"):
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
-    return "文件已上传。MVP 当前对 PDF/DOCX 采用占位解析，请改用文本粘贴以获得最佳结果。"
+async def create_project_from_file_async(
+    db: AsyncSession,
+    user_id: int,
+    title: str,
+    target_role: str,
+    target_city: str | None,
+    years_experience: int | None,
+    file_path: str,
+    content_hash: str | None = None,
+) -> ResumeProject:
+    source_text = (await extract_document_text_async(file_path, content_hash)).strip()
+    if not source_text:
+        raise ExtractionError("no text found in file")
+    project = _new_project(user_id, title, target_role, target_city, years_experience, 1, source_text, file_path)
+    db.add(project)
+    mark_snapshot_stale(db.sync_session, project)
+    await db.commit()
+    return project
+
+
+def normalize_source_text(text: str) -> str:
+    # Whitespace-only differences never change parse/score/JD output.
+    return "\n".join(_nonblank_lines(text))
+
+
+def content_digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def source_digest(project: ResumeProject) -> str:
+    if not project.source_digest:
+        project.source_digest = content_digest(normalize_source_text(project.source_text or ""))
+    return project.source_digest
+
+
+def touch_project(project: ResumeProject) -> None:
+    # Something GET /projects/{id} returns changed; its ETag is derived from this counter.
+    # Incremented in SQL so the API and workers never overwrite each other's bump.
+    project.content_version = ResumeProject.content_version + 1
+    db = object_session(project)
+    if db is not None:
+        mark_snapshot_stale(db, project)
+
+
+def touch_projects(db: Session, projects: list[ResumeProject]) -> None:
+    # touch_project for many projects in one UPDATE; the in-memory content_version is left as loaded.
+    if not projects:
+        return
+    db.execute(
+        update(ResumeProject)
+        .where(ResumeProject.id.in_([p.id for p in projects]))
+        .values(content_version=ResumeProject.content_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    for project in projects:
+        mark_snapshot_stale(db, project)
 
 
 def parse_project(db: Session, project: ResumeProject) -> list[ResumeSection]:
-    # Replace existing sections for re-parse.
-    old_sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id)).scalars().all()
-    for s in old_sections:
-        db.delete(s)
-    db.flush()
+    digest = content_digest(source_digest(project), PARSE_ALGO_VERSION)
+    if project.parse_status == 1 and project.parse_digest == digest:
+        metrics.incr("memo.parse.hit")
+        return list(
+            db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id).order_by(ResumeSection.sort_order)).scalars().all()
+        )
+    metrics.incr("memo.parse.miss")
 
     text = (project.source_text or "").strip()
     if not text:
         raise ValueError("source_text is empty")
 
-    chunks = split_sections(text)
-    sections: list[ResumeSection] = []
-    order = 0
-    for section_name, section_text in chunks:
-        section = ResumeSection(
-            project_id=project.id,
-            section_type=SECTION_MAP.get(section_name, 1),
-            origin_text=section_text.strip(),
-            sort_order=order,
-        )
-        db.add(section)
-        sections.append(section)
-        order += 1
-
+    # Replace existing sections for re-parse: one DELETE, then one multi-row INSERT ... RETURNING.
+    db.execute(delete(ResumeSection).where(ResumeSection.project_id == project.id))
+    rows = [
+        {
+            "project_id": project.id,
+            "section_type": SECTION_MAP.get(section_name, 1),
+            "origin_text": section_text.strip(),
+            "sort_order": order,
+        }
+        for order, (section_name, section_text) in enumerate(split_sections(text))
+    ]
+    # RETURNING order is not guaranteed for multi-row inserts (and asking for it makes SQLite fall back to
+    # one row per statement); sort_order identifies each row instead.
+    sections = sorted(db.scalars(insert(ResumeSection).returning(ResumeSection), rows), key=lambda s: s.sort_order)
+
+    counts = term_counts(text)
+    replace_project_terms(db, project, counts)
+    project.token_index = dump_token_index(set(counts))
+    project.parse_digest = digest
     project.parse_status = 1
     project.updated_at = datetime.utcnow()
-    db.commit()
-    for s in sections:
-        db.refresh(s)
+    touch_project(project)
+    db.flush()
     return sections
 
 
-def split_sections(text: str) -> list[tuple[str, str]]:
-    markers = [
-        ("education", ["教育", "education"]),
-        ("experience", ["工作经历", "experience", "经历"]),
-        ("project", ["项目经历", "projects", "project"]),
-        ("skills", ["技能", "skills"]),
-    ]
-    lines = [x.strip() for x in text.splitlines() if x.strip()]
-    if not lines:
-        return [("profile", text)]
+_TOKEN_INDEX_CACHE: "OrderedDict[tuple[int, datetime], frozenset[str]]" = OrderedDict()
+_TOKEN_INDEX_CACHE_SIZE = 256
+_token_index_lock = threading.Lock()
+
+
+def project_token_index(project: ResumeProject) -> frozenset[str]:
+    # Persisted at parse time; before the first parse it is built from source_text and only cached.
+    key = (project.id, project.updated_at)
+    with _token_index_lock:
+        index = _TOKEN_INDEX_CACHE.get(key)
+        if index is not None:
+            _TOKEN_INDEX_CACHE.move_to_end(key)
+            return index
+    raw = project.token_index
+    index = load_token_index(raw) if raw is not None else frozenset(build_token_index(project.source_text or ""))
+    with _token_index_lock:
+        _TOKEN_INDEX_CACHE[key] = index
+        if len(_TOKEN_INDEX_CACHE) > _TOKEN_INDEX_CACHE_SIZE:
+            _TOKEN_INDEX_CACHE.popitem(last=False)
+    return index
+
+
+def _keys_pattern(keys: list[str]) -> re.Pattern[str]:
+    return re.compile("|".join(re.escape(k.lower()) for k in sorted(keys, key=len, reverse=True)))
+
+
+class SectionMatcher:
+    # Precompiled from a marker table [(section_name, [keys...]), ...] in priority order.
+    # `any_marker` is one alternation over every key and finds the lines that name a section;
+    # only those lines are resolved to the first group with a matching key.
+    def __init__(self, markers: list[tuple[str, list[str]]]):
+        self.names = [name for name, _ in markers]
+        self.groups = [_keys_pattern(keys) for _, keys in markers]
+        self.any_marker = _keys_pattern([k for _, keys in markers for k in keys])
+
+    def resolve(self, lowered: str) -> str | None:
+        for name, pattern in zip(self.names, self.groups):
+            if pattern.search(lowered):
+                return name
+        return None
+
+
+SECTION_MARKERS: list[tuple[str, list[str]]] = [
+    ("education", ["教育", "education"]),
+    ("experience", ["工作经历", "experience", "经历"]),
+    ("project", ["项目经历", "projects", "project"]),
+    ("skills", ["技能", "skills"]),
+]
+SECTION_MATCHER = SectionMatcher(SECTION_MARKERS)
+# Line boundaries recognised by str.splitlines().
+_LINE_SEPARATORS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+_LINE_SEPARATOR_RE = re.compile(f"[{_LINE_SEPARATORS}]")
+
+
+def _nonblank_lines(text: str) -> list[str]:
+    return [line for line in (x.strip() for x in text.splitlines()) if line]
+
+
+def split_sections(text: str, matcher: SectionMatcher = SECTION_MATCHER) -> list[tuple[str, str]]:
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Lower-casing changed the length (a few non-ASCII letters), so offsets do not line up.
+        return _split_sections_by_line(text, matcher)
 
     out: list[tuple[str, str]] = []
     current_type = "profile"
     buf: list[str] = []
-    for line in lines:
+    pos = 0
+    # Single scan for marker keys; body text between marker lines is only split, never matched.
+    for m in matcher.any_marker.finditer(lowered):
+        if m.start() < pos:
+            continue
+        line_start = max(text.rfind(sep, pos, m.start()) for sep in _LINE_SEPARATORS) + 1 or pos
+        line_end_match = _LINE_SEPARATOR_RE.search(text, m.end())
+        line_end = line_end_match.start() if line_end_match else len(text)
+        buf.extend(_nonblank_lines(text[pos:line_start]))
+        if buf:
+            out.append((current_type, "\n".join(buf)))
+        current_type = matcher.resolve(lowered[line_start:line_end]) or current_type
+        buf = []
+        pos = line_end
+    buf.extend(_nonblank_lines(text[pos:]))
+    if buf:
+        out.append((current_type, "\n".join(buf)))
+    if not out:
+        out.append(("profile", text))
+    return out
+
+
+def _split_sections_by_line(text: str, matcher: SectionMatcher) -> list[tuple[str, str]]:
+    out: list[tuple[str, str]] = []
+    current_type = "profile"
+    buf: list[str] = []
+    for line in _nonblank_lines(text):
         lowered = line.lower()
-        matched = None
-        for name, keys in markers:
-            if any(key in lowered for key in keys):
-                matched = name
-                break
+        matched = matcher.resolve(lowered) if matcher.any_marker.search(lowered) else None
         if matched:
             if buf:
                 out.append((current_type, "\n".join(buf)))
@@ -162,67 +325,99 @@ def split_sections(text: str) -> list[tuple[str, str]]:
     return out
 
 
-def score_project(db: Session, project: ResumeProject) -> ResumeScore:
-    sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id)).scalars().all()
-    all_text = "\n".join([s.origin_text for s in sections]).lower()
-    issues = []
-
-    ats = 70
-    if len(all_text) < 300:
-        ats -= 15
-        issues.append("简历内容偏短，建议补充可量化成果。")
-    if "@" not in all_text and "邮箱" not in all_text:
-        ats -= 10
-        issues.append("缺少联系方式字段，可能影响 HR 回访。")
-
-    completeness = min(95, 30 + len(sections) * 15)
-    required = {"education", "experience", "skills"}
-    found = set()
-    for s in sections:
-        for k, v in SECTION_MAP.items():
-            if s.section_type == v:
-                found.add(k)
-    for key in required - found:
-        issues.append(f"缺少 {key} 模块。")
-        completeness -= 8
-
-    role_keywords = role_to_keywords(project.target_role)
-    hit = sum(1 for k in role_keywords if k in all_text)
-    match = int(40 + min(55, hit * 8))
-    if hit < 3:
-        issues.append(f"与目标岗位 `{project.target_role}` 的关键词匹配偏低。")
+def score_digest(project: ResumeProject) -> str:
+    # The taxonomy version is part of the digest: editing the taxonomy file makes stored scores stale.
+    return content_digest(project.parse_digest or "", project.target_role, SCORE_ALGO_VERSION, get_taxonomy().version)
 
-    existing = db.execute(select(ResumeScore).where(ResumeScore.project_id == project.id)).scalars().first()
-    payload = json.dumps(issues, ensure_ascii=False)
+
+def compute_score(project: ResumeProject, sections: list[ResumeSection]) -> dict:
+    # Pure part of scoring: ResumeScore column values for the given sections.
+    return score_values(project.target_role, [s.section_type for s in sections], [s.origin_text for s in sections], project_token_index(project))
+
+
+_SCORE_COLUMNS = ("ats_score", "completeness_score", "match_score", "issues_json")
+
+
+def _store_score(db: Session, project: ResumeProject, existing: ResumeScore | None, values: dict, digest: str) -> ResumeScore:
     if existing:
-        existing.ats_score = max(1, min(100, ats))
-        existing.completeness_score = max(1, min(100, completeness))
-        existing.match_score = max(1, min(100, match))
-        existing.issues_json = payload
+        for key, value in values.items():
+            setattr(existing, key, value)
+        existing.input_digest = digest
         score = existing
     else:
-        score = ResumeScore(
-            project_id=project.id,
-            ats_score=max(1, min(100, ats)),
-            completeness_score=max(1, min(100, completeness)),
-            match_score=max(1, min(100, match)),
-            issues_json=payload,
-        )
+        score = ResumeScore(project_id=project.id, input_digest=digest, **values)
         db.add(score)
-    db.commit()
-    db.refresh(score)
+    touch_project(project)
     return score
 
 
+def score_project(db: Session, project: ResumeProject) -> ResumeScore:
+    digest = score_digest(project)
+    existing = db.execute(select(ResumeScore).where(ResumeScore.project_id == project.id)).scalars().first()
+    if existing and existing.input_digest == digest:
+        metrics.incr("memo.score.hit")
+        return existing
+    metrics.incr("memo.score.miss")
+
+    sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id)).scalars().all()
+    score = _store_score(db, project, existing, compute_score(project, sections), digest)
+    db.flush()
+    return score
+
+
+def score_projects(db: Session, projects: list[ResumeProject]) -> dict[int, tuple[dict, bool]]:
+    # score_project for many projects: existing scores and the sections of the stale ones are read with one
+    # query each; new scores go out as one multi-row INSERT, changed ones in one batched UPDATE at flush.
+    # Returns {project_id: (score column values, recomputed)}.
+    existing = {
+        s.project_id: s for s in db.execute(select(ResumeScore).where(ResumeScore.project_id.in_([p.id for p in projects]))).scalars()
+    }
+    out: dict[int, tuple[dict, bool]] = {}
+    stale: list[ResumeProject] = []
+    for project in projects:
+        score = existing.get(project.id)
+        if score and score.input_digest == score_digest(project):
+            out[project.id] = ({c: getattr(score, c) for c in _SCORE_COLUMNS}, False)
+        else:
+            stale.append(project)
+    metrics.incr("memo.score.hit", len(projects) - len(stale))
+    metrics.incr("memo.score.miss", len(stale))
+
+    sections = sections_by_project(db, [p.id for p in stale])
+    new_rows: list[dict] = []
+    for project in stale:
+        values = compute_score(project, sections[project.id])
+        out[project.id] = (values, True)
+        score = existing.get(project.id)
+        if score:
+            for key, value in values.items():
+                setattr(score, key, value)
+            score.input_digest = score_digest(project)
+        else:
+            new_rows.append({"project_id": project.id, "input_digest": score_digest(project), **values})
+    if new_rows:
+        db.execute(insert(ResumeScore), new_rows)
+    touch_projects(db, stale)
+    db.flush()
+    return out
+
+
 def analyze_jd(db: Session, project: ResumeProject, jd_text: str) -> JdProfile:
-    keywords = extract_keywords(jd_text)
-    all_text = (project.source_text or "").lower()
-    missing = [k for k in keywords if k not in all_text]
+    digest = content_digest(source_digest(project), normalize_source_text(jd_text), JD_ALGO_VERSION)
     existing = db.execute(select(JdProfile).where(JdProfile.project_id == project.id)).scalars().first()
+    if existing and existing.input_digest == digest:
+        metrics.incr("memo.jd.hit")
+        return existing
+    metrics.incr("memo.jd.miss")
+
+    keywords = extract_keywords(jd_text)
+    index = project_token_index(project)
+    missing = [k for k in keywords if not contains_keyword(index, k)]
     if existing:
         existing.jd_text = jd_text
         existing.keywords_json = json.dumps(keywords, ensure_ascii=False)
         existing.missing_keywords_json = json.dumps(missing, ensure_ascii=False)
+        existing.input_digest = digest
         profile = existing
     else:
         profile = JdProfile(
@@ -230,27 +425,68 @@ def analyze_jd(db: Session, project: ResumeProject, jd_text: str) -> JdProfile:
             jd_text=jd_text,
             keywords_json=json.dumps(keywords, ensure_ascii=False),
             missing_keywords_json=json.dumps(missing, ensure_ascii=False),
+            input_digest=digest,
         )
         db.add(profile)
-    db.commit()
-    db.refresh(profile)
+    touch_project(project)
+    db.flush()
     return profile
 
 
-def rewrite_sections(db: Session, project: ResumeProject, mode: str, use_jd: bool) -> list[ResumeSection]:
-    sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id).order_by(ResumeSection.sort_order)).scalars().all()
-    jd_missing: list[str] = []
-    if use_jd:
-        jd = db.execute(select(JdProfile).where(JdProfile.project_id == project.id)).scalars().first()
-        if jd:
-            jd_missing = json.loads(jd.missing_keywords_json)
+def _rewrite_keywords(jd_missing_json: str | None) -> list[str]:
+    return json.loads(jd_missing_json)[:REWRITE_KEYWORD_LIMIT] if jd_missing_json else []
+
 
+def _rewrite_stale_sections(sections: list[ResumeSection], mode: str, keywords: list[str]) -> int:
+    recomputed = 0
     for sec in sections:
-        sec.optimized_text = optimize_text(sec.origin_text, mode, jd_missing)
+        fingerprint = content_digest(sec.origin_text, mode, "\x1e".join(keywords), REWRITE_ALGO_VERSION)
+        if sec.optimized_text is not None and sec.rewrite_fingerprint == fingerprint:
+            continue
+        sec.optimized_text = optimize_text(sec.origin_text, mode, keywords)
+        sec.rewrite_fingerprint = fingerprint
         sec.is_accepted = False
-    db.add(UsageLedger(user_id=project.user_id, project_id=project.id, action_type=1, used_units=1))
-    db.commit()
-    return sections
+        recomputed += 1
+    metrics.incr("memo.rewrite_section.hit", len(sections) - recomputed)
+    metrics.incr("memo.rewrite_section.miss", recomputed)
+    return recomputed
+
+
+def rewrite_sections(db: Session, project: ResumeProject, mode: str, use_jd: bool) -> tuple[list[ResumeSection], int]:
+    # Only sections whose (origin_text, mode, suggested keywords) changed are rewritten; the others keep
+    # their optimized_text, user edits and is_accepted. Returns the sections and how many were recomputed.
+    sections = db.execute(select(ResumeSection).where(ResumeSection.project_id == project.id).order_by(ResumeSection.sort_order)).scalars().all()
+    jd_missing = None
+    if use_jd:
+        jd_missing = db.execute(select(JdProfile.missing_keywords_json).where(JdProfile.project_id == project.id)).scalar()
+    recomputed = _rewrite_stale_sections(sections, mode, _rewrite_keywords(jd_missing))
+    if recomputed:
+        record_usage(db, project.user_id, project.id, action_type=1)
+        touch_project(project)
+    db.flush()
+    return sections, recomputed
+
+
+def rewrite_projects(db: Session, projects: list[ResumeProject], mode: str, use_jd: bool) -> dict[int, tuple[list[ResumeSection], int]]:
+    # rewrite_sections for many projects of one user: sections and JD keywords are read with one query
+    # each and every rewritten project is charged through a single usage upsert.
+    ids = [p.id for p in projects]
+    sections = sections_by_project(db, ids)
+    jd_missing: dict[int, str] = {}
+    if use_jd and ids:
+        jd_missing = dict(db.execute(select(JdProfile.project_id, JdProfile.missing_keywords_json).where(JdProfile.project_id.in_(ids))).all())
+    out: dict[int, tuple[list[ResumeSection], int]] = {}
+    charged: list[ResumeProject] = []
+    for project in projects:
+        recomputed = _rewrite_stale_sections(sections[project.id], mode, _rewrite_keywords(jd_missing.get(project.id)))
+        if recomputed:
+            charged.append(project)
+        out[project.id] = (sections[project.id], recomputed)
+    if charged:
+        record_usage_many(db, projects[0].user_id, [p.id for p in charged], action_type=1)
+        touch_projects(db, charged)
+    db.flush()
+    return out
 
 
 def optimize_text(origin: str, mode: str, missing_keywords: list[str]) -> str:
@@ -268,31 +504,28 @@ def optimize_text(origin: str, mode: str, missing_keywords: list[str]) -> str:
         else:
             out.append(f"{prefix}{line}，并通过量化指标体现业务影响。")
     if missing_keywords:
-        top = "、".join(missing_keywords[:5])
+        top = "、".join(missing_keywords[:REWRITE_KEYWORD_LIMIT])
         out.append(f"关键词补齐建议：可结合实际补充 {top}。")
     return "\n".join(out) if out else origin
 
 
-def role_to_keywords(role: str) -> list[str]:
-    role = role.lower()
-    if "python" in role:
-        return ["python", "fastapi", "flask", "sql", "redis", "docker", "api"]
-    if "前端" in role or "frontend" in role:
-        return ["vue", "react", "javascript", "typescript", "css", "webpack"]
-    return ["沟通", "协作", "项目", "交付", "优化"]
+_KEYWORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9+.#-]{1,20}|[\u4e00-\u9fa5]{2,8}")
+_KEYWORD_STOP_WORDS = frozenset({"我们", "负责", "要求", "相关", "优先", "经验", "能力", "以上", "以及", "进行"})
 
 
 def extract_keywords(text: str) -> list[str]:
-    words = re.findall(r"[A-Za-z][A-Za-z0-9+.#-]{1,20}|[\u4e00-\u9fa5]{2,8}", text)
-    stop = {"我们", "负责", "要求", "相关", "优先", "经验", "能力", "以上", "以及", "进行"}
+    return list(_extract_keywords(text))
+
+
+@lru_cache(maxsize=512)
+def _extract_keywords(text: str) -> tuple[str, ...]:
     seen = set()
     result: list[str] = []
-    for w in words:
+    for w in _KEYWORD_RE.findall(text):
         lw = w.lower()
-        if lw in stop:
+        if lw in _KEYWORD_STOP_WORDS:
             continue
         if lw not in seen:
             seen.add(lw)
             result.append(w)
-    return result[:30]
-
+    return tuple(result[:30])
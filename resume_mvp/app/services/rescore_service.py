@@ -0,0 +1,125 @@
+import json
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, undefer
+
+from app.db.models import ResumeProject, ResumeScore
+from app.services.project_service import SCORE_ALGO_VERSION, score_digest, touch_projects
+from app.services.scoring import score_inputs
+from app.services.snapshot_service import sections_by_project
+
+
+def _upsert_scores(db: Session, rows: list[dict]) -> None:
+    # One INSERT .. ON CONFLICT (project_id) DO UPDATE for the whole chunk.
+    upsert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = upsert(ResumeScore)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ResumeScore.project_id],
+            set_={c: stmt.excluded[c] for c in ("ats_score", "completeness_score", "match_score", "issues_json", "input_digest")},
+        ),
+        rows,
+    )
+
+
+def load_checkpoint(path: str | None) -> dict | None:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path: str, state: dict) -> None:
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def rescore_projects(
+    db: Session,
+    chunk_size: int = 500,
+    workers: int = 0,
+    checkpoint_path: str | None = None,
+    force: bool = False,
+    on_chunk: Callable[[dict], None] | None = None,
+) -> dict:
+    # Walks parsed projects in id order, chunk_size at a time: projects, sections and score digests are
+    # read with one query each, stale projects are scored in `workers` processes (in-process when 0) and
+    # their scores upserted in one statement, one commit per chunk. The checkpoint is written after each
+    # commit; a run started with the same checkpoint continues after the last committed project.
+    state = load_checkpoint(checkpoint_path)
+    if not state or state.get("finished") or state.get("algo") != SCORE_ALGO_VERSION:
+        state = {"algo": SCORE_ALGO_VERSION, "last_id": 0, "scanned": 0, "rescored": 0, "finished": False}
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) if workers > 0 else None
+    started = time.monotonic()
+    scanned_this_run = 0
+    try:
+        while True:
+            projects = db.execute(
+                select(ResumeProject)
+                .options(undefer(ResumeProject.token_index))
+                .where(ResumeProject.id > state["last_id"], ResumeProject.is_deleted.is_(False), ResumeProject.parse_status == 1)
+                .order_by(ResumeProject.id)
+                .limit(chunk_size)
+            ).scalars().all()
+            if not projects:
+                state["finished"] = True
+                if checkpoint_path:
+                    _save_checkpoint(checkpoint_path, state)
+                break
+            ids = [p.id for p in projects]
+            digests = dict(db.execute(select(ResumeScore.project_id, ResumeScore.input_digest).where(ResumeScore.project_id.in_(ids))).all())
+            stale = [p for p in projects if force or digests.get(p.id) != score_digest(p)]
+            sections = sections_by_project(db, [p.id for p in stale])
+            inputs = [
+                (
+                    p.id,
+                    p.target_role,
+                    [s.section_type for s in sections[p.id]],
+                    [s.origin_text for s in sections[p.id]],
+                    p.token_index,
+                    p.source_text or "",
+                )
+                for p in stale
+            ]
+            if pool and inputs:
+                slices = [inputs[i::workers] for i in range(workers)]
+                results = [r for part in pool.map(score_inputs, slices) for r in part]
+            else:
+                results = score_inputs(inputs)
+            by_id = {p.id: p for p in stale}
+            if results:
+                _upsert_scores(
+                    db,
+                    [
+                        {"project_id": project_id, "input_digest": score_digest(by_id[project_id]), "created_at": datetime.utcnow(), **values}
+                        for project_id, values in results
+                    ],
+                )
+                touch_projects(db, stale)
+            db.commit()
+            db.expunge_all()
+
+            scanned_this_run += len(projects)
+            state["last_id"] = ids[-1]
+            state["scanned"] += len(projects)
+            state["rescored"] += len(results)
+            elapsed = time.monotonic() - started
+            state["projects_per_sec"] = round(scanned_this_run / elapsed, 1) if elapsed > 0 else None
+            if checkpoint_path:
+                _save_checkpoint(checkpoint_path, state)
+            if on_chunk:
+                on_chunk(state)
+    finally:
+        if pool:
+            pool.shutdown()
+    return state
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.services.text_index import keyword_terms
+
+
+# Kept free of DB/ORM imports like scoring.py, which uses it inside the rescoring pool.
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources", "role_taxonomy.json")
+_RESOLVE_CACHE_SIZE = 10000
+_SEPARATORS_RE = re.compile(r"[\s\-_/\\|·,，、.()（）\[\]【】]+")
+_CJK_GAP_RE = re.compile(r" ?([一-龥]+) ?")
+_WORD_CHAR_RE = re.compile(r"[a-z0-9+#]")
+_VERSION_SUFFIX_RE = re.compile(r"[0-9]+")
+
+
+def normalize_role(text: str) -> str:
+    # Lower-case, separators collapsed to one space, no spaces next to CJK: "Python 后端-开发" -> "python后端开发".
+    text = _SEPARATORS_RE.sub(" ", text.lower()).strip()
+    return _CJK_GAP_RE.sub(r"\1", text)
+
+
+@dataclass(frozen=True)
+class Role:
+    id: str
+    name: str
+    keywords: tuple[tuple[str, float], ...]
+    # (index terms, weight) per keyword, see text_index.keyword_terms.
+    keyword_terms: tuple[tuple[tuple[str, ...], float], ...]
+
+    @property
+    def total_weight(self) -> float:
+        return sum(weight for _, weight in self.keyword_terms)
+
+
+class RoleTaxonomy:
+    # Aliases live in one character trie. Resolving scans the normalised role once, walking the trie
+    # from each position (bounded by the longest alias), so the cost is linear in len(target_role).
+    # Job-title aliases beat skill aliases; among those the longest match wins, then the later one
+    # (the head noun comes last: "python 数据分析师" is an analyst).
+    def __init__(self, data: dict, version: str):
+        self.version = version
+        self.roles: dict[str, Role] = {}
+        self._trie: dict = {}
+        self._max_alias = 0
+        for entry in data["roles"]:
+            keywords = tuple((k, float(w)) for k, w in entry.get("keywords", {}).items())
+            terms = tuple((tuple(t), w) for t, w in ((keyword_terms(k), w) for k, w in keywords) if t)
+            role = Role(id=entry["id"], name=entry.get("name", entry["id"]), keywords=keywords, keyword_terms=terms)
+            self.roles[role.id] = role
+            for alias in entry.get("aliases", []):
+                self._add_alias(normalize_role(alias), role.id, 1)
+            for alias in entry.get("skill_aliases", []):
+                self._add_alias(normalize_role(alias), role.id, 0)
+        self.default = self.roles[data["default_role"]]
+        self._resolved: dict[str, Role] = {}
+
+    def _add_alias(self, alias: str, role_id: str, strength: int) -> None:
+        if not alias:
+            return
+        node = self._trie
+        for ch in alias:
+            node = node.setdefault(ch, {})
+        # First definition wins when two roles list the same alias.
+        node.setdefault("", (role_id, strength))
+        self._max_alias = max(self._max_alias, len(alias))
+
+    def _match(self, text: str) -> Role:
+        best: tuple[int, int, int] | None = None
+        best_role = self.default
+        n = len(text)
+        for start in range(n):
+            if start and _WORD_CHAR_RE.match(text[start]) and _WORD_CHAR_RE.match(text[start - 1]):
+                continue  # ASCII aliases only match whole words
+            node = self._trie
+            for end in range(start, min(n, start + self._max_alias)):
+                node = node.get(text[end])
+                if node is None:
+                    break
+                hit = node.get("")
+                if hit is None:
+                    continue
+                after = end + 1
+                if text[end].isalpha() and after < n:
+                    # A version number may follow an alias: "python3", "vue2", "java8".
+                    suffix = _VERSION_SUFFIX_RE.match(text, after)
+                    if suffix:
+                        after = suffix.end()
+                if after < n and _WORD_CHAR_RE.match(text[end]) and _WORD_CHAR_RE.match(text[after]):
+                    continue
+                rank = (hit[1], end + 1 - start, end)
+                if best is None or rank > best:
+                    best, best_role = rank, self.roles[hit[0]]
+        return best_role
+
+    def resolve(self, target_role: str) -> Role:
+        role = self._resolved.get(target_role)
+        if role is not None:
+            metrics.incr("taxonomy.resolve.hit")
+            return role
+        metrics.incr("taxonomy.resolve.miss")
+        role = self._match(normalize_role(target_role))
+        if len(self._resolved) >= _RESOLVE_CACHE_SIZE:
+            self._resolved.clear()
+        self._resolved[target_role] = role
+        return role
+
+
+def load_taxonomy(path: str) -> RoleTaxonomy:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return RoleTaxonomy(json.loads(raw), hashlib.sha256(raw).hexdigest()[:12])
+
+
+_taxonomy: RoleTaxonomy | None = None
+_taxonomy_mtime: float | None = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_taxonomy() -> RoleTaxonomy:
+    # Loaded on first use; afterwards the file's mtime is checked at most every
+    # role_taxonomy_reload_seconds and a changed file is swapped in. A broken edit keeps the old one.
+    global _taxonomy, _taxonomy_mtime, _checked_at
+    settings = get_settings()
+    now = time.monotonic()
+    if _taxonomy is not None and now - _checked_at < settings.role_taxonomy_reload_seconds:
+        return _taxonomy
+    with _lock:
+        if _taxonomy is not None and now - _checked_at < settings.role_taxonomy_reload_seconds:
+            return _taxonomy
+        _checked_at = now
+        path = settings.role_taxonomy_path or DEFAULT_TAXONOMY_PATH
+        try:
+            mtime = os.stat(path).st_mtime
+            if _taxonomy is not None and mtime == _taxonomy_mtime:
+                return _taxonomy
+            # Remembered before loading so a broken file is reported once, not on every check.
+            _taxonomy_mtime = mtime
+            _taxonomy = load_taxonomy(path)
+            logger.info("role taxonomy %s loaded from %s (%s roles)", _taxonomy.version, path, len(_taxonomy.roles))
+        except (OSError, ValueError, KeyError, TypeError):
+            if _taxonomy is None:
+                raise
+            logger.exception("role taxonomy reload from %s failed, keeping %s", path, _taxonomy.version)
+        return _taxonomy
+
+
+def resolve_role(target_role: str) -> Role:
+    return get_taxonomy().resolve(target_role)
@@ -0,0 +1,69 @@
+import json
+
+from app.services.role_taxonomy import resolve_role
+from app.services.text_index import build_token_index, load_token_index
+
+
+# Kept free of DB/ORM imports: the rescoring pool spawns processes that import this module on their own.
+SECTION_MAP = {
+    "profile": 1,
+    "education": 2,
+    "experience": 3,
+    "project": 4,
+    "skills": 5,
+}
+_SECTION_NAMES = {v: k for k, v in SECTION_MAP.items()}
+REQUIRED_SECTIONS = ("education", "experience", "skills")
+
+
+def role_to_keywords(role: str) -> list[str]:
+    return [keyword for keyword, _ in resolve_role(role).keywords]
+
+
+def score_values(target_role: str, section_types: list[int], section_texts: list[str], index: frozenset[str]) -> dict:
+    # ResumeScore column values from plain inputs; see project_service.compute_score.
+    all_text = "\n".join(section_texts).lower()
+    issues = []
+
+    ats = 70
+    if len(all_text) < 300:
+        ats -= 15
+        issues.append("简历内容偏短，建议补充可量化成果。")
+    if "@" not in all_text and "邮箱" not in all_text:
+        ats -= 10
+        issues.append("缺少联系方式字段，可能影响 HR 回访。")
+
+    completeness = min(95, 30 + len(section_types) * 15)
+    found = {_SECTION_NAMES.get(t) for t in section_types}
+    for key in REQUIRED_SECTIONS:
+        if key not in found:
+            issues.append(f"缺少 {key} 模块。")
+            completeness -= 8
+
+    # Keyword weights come from the role taxonomy; match is scaled by the share of weight found.
+    role = resolve_role(target_role)
+    hit = sum(weight for terms, weight in role.keyword_terms if index.issuperset(terms))
+    ratio = hit / role.total_weight if role.total_weight else 0.0
+    match = int(40 + round(55 * ratio))
+    if ratio < 0.4:
+        issues.append(f"与目标岗位 `{target_role}` 的关键词匹配偏低。")
+
+    return {
+        "ats_score": max(1, min(100, ats)),
+        "completeness_score": max(1, min(100, completeness)),
+        "match_score": max(1, min(100, match)),
+        "issues_json": json.dumps(issues, ensure_ascii=False),
+    }
+
+
+# (project_id, target_role, section_types, section_texts, persisted token_index or None, source_text)
+ScoreInput = tuple[int, str, list[int], list[str], str | None, str]
+
+
+def score_inputs(inputs: list[ScoreInput]) -> list[tuple[int, dict]]:
+    # Process-pool entry point of rescore_service: plain tuples in, column values out.
+    out = []
+    for project_id, target_role, types, texts, raw_index, source_text in inputs:
+        index = load_token_index(raw_index) if raw_index is not None else frozenset(build_token_index(source_text))
+        out.append((project_id, score_values(target_role, types, texts, index)))
+    return out
@@ -0,0 +1,171 @@
+import json
+from datetime import datetime
+
+import orjson
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import JdProfile, ProjectSnapshot, ResumeProject, ResumeScore, ResumeSection
+
+
+def sections_stmt(project_id: int):
+    return select(ResumeSection).where(ResumeSection.project_id == project_id).order_by(ResumeSection.sort_order)
+
+
+def sections_by_project(db: Session, project_ids: list[int]) -> dict[int, list[ResumeSection]]:
+    # Sections of many projects in one query, grouped per project in sort order.
+    grouped: dict[int, list[ResumeSection]] = {project_id: [] for project_id in project_ids}
+    if project_ids:
+        rows = db.execute(
+            select(ResumeSection).where(ResumeSection.project_id.in_(project_ids)).order_by(ResumeSection.project_id, ResumeSection.sort_order)
+        ).scalars()
+        for section in rows:
+            grouped[section.project_id].append(section)
+    return grouped
+
+
+def project_detail(project: ResumeProject, sections: list[ResumeSection], score: ResumeScore | None, jd: JdProfile | None) -> dict:
+    return {
+        "project": {
+            "id": project.id,
+            "title": project.title,
+            "target_role": project.target_role,
+            "target_city": project.target_city,
+            "years_experience": project.years_experience,
+            "parse_status": project.parse_status,
+        },
+        "sections": [
+            {
+                "id": s.id,
+                "section_type": s.section_type,
+                "origin_text": s.origin_text,
+                "optimized_text": s.optimized_text,
+                "is_accepted": s.is_accepted,
+            }
+            for s in sections
+        ],
+        "score": (
+            {
+                "ats_score": score.ats_score,
+                "completeness_score": score.completeness_score,
+                "match_score": score.match_score,
+                "issues": json.loads(score.issues_json),
+            }
+            if score
+            else None
+        ),
+        "jd_profile": (
+            {
+                "keywords": json.loads(jd.keywords_json),
+                "missing_keywords": json.loads(jd.missing_keywords_json),
+            }
+            if jd
+            else None
+        ),
+    }
+
+
+def render_detail(detail: dict) -> bytes:
+    # The complete GET /projects/{id} response body, byte for byte what ok(detail) sends.
+    return orjson.dumps({"code": 0, "message": "ok", "data": detail})
+
+
+def build_project_detail(db: Session, project: ResumeProject) -> dict:
+    sections = db.execute(sections_stmt(project.id)).scalars().all()
+    score = db.execute(select(ResumeScore).where(ResumeScore.project_id == project.id)).scalars().first()
+    jd = db.execute(select(JdProfile).where(JdProfile.project_id == project.id)).scalars().first()
+    return project_detail(project, sections, score, jd)
+
+
+def mark_snapshot_stale(db: Session, project: ResumeProject) -> None:
+    # The snapshot is rebuilt right before the transaction commits, from what it is about to commit.
+    db.info.setdefault("stale_snapshots", set()).add(project)
+
+
+def _upsert_snapshots(db: Session, rows: list[dict]) -> None:
+    # INSERT .. ON CONFLICT (project_id) DO UPDATE: two transactions building a project's first snapshot
+    # at once both succeed. An older content_version never replaces a newer one.
+    upsert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = upsert(ProjectSnapshot)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ProjectSnapshot.project_id],
+            set_={c: stmt.excluded[c] for c in ("content_version", "body", "updated_at")},
+            where=ProjectSnapshot.content_version <= stmt.excluded.content_version,
+        ),
+        rows,
+    )
+
+
+def _snapshot_row(project_id: int, content_version: int, detail: dict) -> dict:
+    return {"project_id": project_id, "content_version": content_version, "body": render_detail(detail), "updated_at": datetime.utcnow()}
+
+
+def refresh_project_snapshot(db: Session, project: ResumeProject) -> None:
+    _upsert_snapshots(db, [_snapshot_row(project.id, project.content_version, build_project_detail(db, project))])
+
+
+def refresh_project_snapshots(db: Session, projects: list[ResumeProject]) -> None:
+    # Same as refresh_project_snapshot for many projects, with one query per table instead of per project.
+    ids = [p.id for p in projects]
+    versions = dict(db.execute(select(ResumeProject.id, ResumeProject.content_version).where(ResumeProject.id.in_(ids))).all())
+    sections = sections_by_project(db, ids)
+    scores = {s.project_id: s for s in db.execute(select(ResumeScore).where(ResumeScore.project_id.in_(ids))).scalars()}
+    jds = {j.project_id: j for j in db.execute(select(JdProfile).where(JdProfile.project_id.in_(ids))).scalars()}
+    _upsert_snapshots(
+        db,
+        [
+            _snapshot_row(project.id, versions[project.id], project_detail(project, sections[project.id], scores.get(project.id), jds.get(project.id)))
+            for project in projects
+        ],
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_stale_snapshots(session: Session) -> None:
+    stale = session.info.pop("stale_snapshots", None)
+    if not stale:
+        return
+    session.flush()
+    refresh_project_snapshots(session, list(stale))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_snapshots(session: Session) -> None:
+    session.info.pop("stale_snapshots", None)
+
+
+def check_snapshots(db: Session, fix: bool = False, batch_size: int = 200) -> dict:
+    # Compare every live project with its snapshot; with fix, rebuild the ones that are missing or differ.
+    checked = 0
+    mismatched: list[int] = []
+    missing: list[int] = []
+    last_id = 0
+    while True:
+        projects = db.execute(
+            select(ResumeProject).where(ResumeProject.id > last_id, ResumeProject.is_deleted.is_(False)).order_by(ResumeProject.id).limit(batch_size)
+        ).scalars().all()
+        if not projects:
+            break
+        last_id = projects[-1].id
+        snapshots = {
+            s.project_id: s
+            for s in db.execute(select(ProjectSnapshot).where(ProjectSnapshot.project_id.in_([p.id for p in projects]))).scalars()
+        }
+        for project in projects:
+            checked += 1
+            snapshot = snapshots.get(project.id)
+            if snapshot is None:
+                missing.append(project.id)
+            elif snapshot.content_version != project.content_version or snapshot.body != render_detail(build_project_detail(db, project)):
+                mismatched.append(project.id)
+            else:
+                continue
+            if fix:
+                refresh_project_snapshot(db, project)
+        if fix:
+            db.commit()
+        db.expunge_all()
+    return {"checked": checked, "missing": missing, "mismatched": mismatched, "fixed": fix and bool(missing or mismatched)}
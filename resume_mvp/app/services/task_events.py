@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import select
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.db.models import AsyncTask
+from app.db.session import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_TASK_STATUSES = ("done", "failed")
+
+
+def task_version(row) -> tuple:
+    # What a client has seen of a task; same fields as the task ETag.
+    return (row.status, row.attempts, row.updated_at)
+
+
+def _load_task_versions(task_ids: list[int]) -> dict[int, tuple]:
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(AsyncTask.id, AsyncTask.status, AsyncTask.attempts, AsyncTask.updated_at).where(AsyncTask.id.in_(task_ids))
+        ).all()
+        return {row.id: task_version(row) for row in rows}
+    finally:
+        db.close()
+
+
+class LocalTaskChannel:
+    # Only sees updates published by this process (tasks executed in-process, tests).
+    def watch(self, hub: "TaskEventHub") -> None:
+        pass
+
+
+class DbPollTaskChannel:
+    # Cross-process stand-in: while anyone waits, one loop per API process reads the versions of all
+    # watched tasks in a single query and wakes the waiters whose task changed. A broker-backed channel
+    # (LISTEN/NOTIFY, Redis pub/sub) would implement the same watch() and call hub.notify().
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._runner: asyncio.Task | None = None
+
+    def watch(self, hub: "TaskEventHub") -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.get_running_loop().create_task(self._run(hub))
+
+    async def _run(self, hub: "TaskEventHub") -> None:
+        while hub.watched():
+            await asyncio.sleep(self.interval)
+            task_ids = hub.watched()
+            if not task_ids:
+                break
+            try:
+                versions = await asyncio.to_thread(_load_task_versions, task_ids)
+            except Exception:
+                logger.exception("task status poll failed")
+                continue
+            metrics.incr("task_events.poll")
+            for task_id in task_ids:
+                hub.notify(task_id, versions.get(task_id))
+
+
+class TaskEventHub:
+    # Waiters park on a task until its version differs from the one they saw. Process-local.
+    def __init__(self, channel):
+        self.channel = channel
+        self._waiters: dict[int, list[tuple[tuple | None, asyncio.Future]]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def watched(self) -> list[int]:
+        with self._lock:
+            return list(self._waiters)
+
+    async def wait_for_change(self, task_id: int, seen_version: tuple | None, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        future = loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(task_id, []).append((seen_version, future))
+        self.channel.watch(self)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = [w for w in self._waiters.get(task_id, []) if w[1] is not future]
+                if waiters:
+                    self._waiters[task_id] = waiters
+                else:
+                    self._waiters.pop(task_id, None)
+
+    def notify(self, task_id: int, version: tuple | None = None) -> None:
+        # Must run on the hub's loop; version=None wakes every waiter of the task.
+        with self._lock:
+            waiters = list(self._waiters.get(task_id, []))
+        for seen_version, future in waiters:
+            if not future.done() and (version is None or version != seen_version):
+                future.set_result(None)
+
+    def publish(self, task_id: int) -> None:
+        # Thread-safe: called by task_service after a status change is committed.
+        loop = self._loop
+        if loop is None or loop.is_closed() or task_id not in self._waiters:
+            return
+        loop.call_soon_threadsafe(self.notify, task_id)
+
+
+def _make_channel():
+    settings = get_settings()
+    if settings.task_events_channel == "local":
+        return LocalTaskChannel()
+    return DbPollTaskChannel(settings.task_events_poll_interval_seconds)
+
+
+task_hub = TaskEventHub(_make_channel())
+
+
+def publish_task_update(task_id: int) -> None:
+    task_hub.publish(task_id)
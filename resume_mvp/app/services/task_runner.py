@@ -0,0 +1,174 @@
+import json
+from collections.abc import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, undefer
+
+from app.db.models import AsyncTask, ResumeProject
+from app.services.export_service import export_project_to_pdf, remove_files_after_commit
+from app.services.import_service import import_projects
+from app.services.project_service import parse_project, rewrite_projects, rewrite_sections, score_project, score_projects, touch_project
+from app.services.task_service import TaskUnitOfWork, set_task_failed
+
+
+TaskHandler = Callable[[TaskUnitOfWork], dict]
+TaskCleanup = Callable[[Session, AsyncTask], None]
+TASK_HANDLERS: dict[str, TaskHandler] = {}
+# Run when a task of the type is failed for good: from the handler's last attempt or after its lease expired too often.
+TASK_CLEANUPS: dict[str, TaskCleanup] = {}
+
+
+def task_handler(task_type: str, cleanup: TaskCleanup | None = None) -> Callable[[TaskHandler], TaskHandler]:
+    def register(fn: TaskHandler) -> TaskHandler:
+        TASK_HANDLERS[task_type] = fn
+        if cleanup:
+            TASK_CLEANUPS[task_type] = cleanup
+        return fn
+
+    return register
+
+
+def _load_project(db: Session, task: AsyncTask) -> ResumeProject:
+    project = db.execute(
+        select(ResumeProject).where(
+            ResumeProject.id == task.project_id,
+            ResumeProject.user_id == task.user_id,
+            ResumeProject.is_deleted.is_(False),
+        )
+    ).scalars().first()
+    if not project:
+        raise ValueError("project not found")
+    return project
+
+
+def _load_projects(db: Session, task: AsyncTask, project_ids: list[int]) -> list[ResumeProject]:
+    # Ownership was checked when the batch was enqueued; projects deleted since then are reported, not failed.
+    return db.execute(
+        select(ResumeProject)
+        .options(undefer(ResumeProject.token_index))
+        .where(ResumeProject.id.in_(project_ids), ResumeProject.user_id == task.user_id, ResumeProject.is_deleted.is_(False))
+        .order_by(ResumeProject.id)
+    ).scalars().all()
+
+
+def _batch_results(project_ids: list[int], results: dict[int, dict]) -> dict:
+    return {"results": [results.get(project_id, {"project_id": project_id, "status": "not_found"}) for project_id in project_ids]}
+
+
+def _payload(task: AsyncTask) -> dict:
+    return json.loads(task.payload_json) if task.payload_json else {}
+
+
+def _mark_parse_failed(db: Session, task: AsyncTask) -> None:
+    # Otherwise the project would show parse_status 0 (processing) forever.
+    project = db.get(ResumeProject, task.project_id) if task.project_id else None
+    if project is not None and not project.is_deleted:
+        project.parse_status = 2
+        touch_project(project)
+
+
+@task_handler("parse", cleanup=_mark_parse_failed)
+def _run_parse(uow: TaskUnitOfWork) -> dict:
+    project = _load_project(uow.db, uow.task)
+    sections = parse_project(uow.db, project)
+    return {"section_count": len(sections)}
+
+
+@task_handler("score")
+def _run_score(uow: TaskUnitOfWork) -> dict:
+    score_obj = score_project(uow.db, _load_project(uow.db, uow.task))
+    return {
+        "ats_score": score_obj.ats_score,
+        "completeness_score": score_obj.completeness_score,
+        "match_score": score_obj.match_score,
+    }
+
+
+@task_handler("rewrite")
+def _run_rewrite(uow: TaskUnitOfWork) -> dict:
+    payload = _payload(uow.task)
+    project = _load_project(uow.db, uow.task)
+    sections, recomputed = rewrite_sections(uow.db, project, payload.get("mode", "balanced"), payload.get("use_jd", True))
+    return {"section_count": len(sections), "recomputed": recomputed}
+
+
+@task_handler("batch_score")
+def _run_batch_score(uow: TaskUnitOfWork) -> dict:
+    payload = _payload(uow.task)
+    projects = _load_projects(uow.db, uow.task, payload["project_ids"])
+    if payload.get("target_role"):
+        for project in projects:
+            project.target_role = payload["target_role"]
+    scores = score_projects(uow.db, projects)
+    results = {
+        project_id: {
+            "project_id": project_id,
+            "status": "ok",
+            "ats_score": values["ats_score"],
+            "completeness_score": values["completeness_score"],
+            "match_score": values["match_score"],
+            "recomputed": recomputed,
+        }
+        for project_id, (values, recomputed) in scores.items()
+    }
+    return _batch_results(payload["project_ids"], results)
+
+
+@task_handler("batch_rewrite")
+def _run_batch_rewrite(uow: TaskUnitOfWork) -> dict:
+    payload = _payload(uow.task)
+    projects = _load_projects(uow.db, uow.task, payload["project_ids"])
+    rewritten = rewrite_projects(uow.db, projects, payload.get("mode", "balanced"), payload.get("use_jd", True))
+    results = {
+        project_id: {"project_id": project_id, "status": "ok", "section_count": len(sections), "recomputed": recomputed}
+        for project_id, (sections, recomputed) in rewritten.items()
+    }
+    return _batch_results(payload["project_ids"], results)
+
+
+def _remove_import_source(db: Session, task: AsyncTask) -> None:
+    remove_files_after_commit(db, [_payload(task)["path"]])
+
+
+@task_handler("import", cleanup=_remove_import_source)
+def _run_import(uow: TaskUnitOfWork) -> dict:
+    # Commits once per batch, with the progress, so a retried attempt resumes after the last committed batch.
+    payload = _payload(uow.task)
+    progress = import_projects(
+        uow.db,
+        uow.task.user_id,
+        payload["path"],
+        payload["kind"],
+        payload.get("target_role"),
+        payload.get("chain", "none"),
+        progress=json.loads(uow.task.result_json) if uow.task.result_json else None,
+        on_batch=uow.save_progress,
+        unpack_key=f"task{uow.task.id}",
+    )
+    remove_files_after_commit(uow.db, [payload["path"]])
+    return progress
+
+
+@task_handler("export")
+def _run_export(uow: TaskUnitOfWork) -> dict:
+    payload = _payload(uow.task)
+    export = export_project_to_pdf(uow.db, _load_project(uow.db, uow.task), payload.get("template", "ats_default"))
+    return {"export_id": export.id, "format": export.format}
+
+
+def execute_task(db: Session, task: AsyncTask) -> None:
+    handler = TASK_HANDLERS.get(task.task_type)
+    if handler is None:
+        set_task_failed(db, task, f"unknown task_type: {task.task_type}")
+        return
+    cleanup = TASK_CLEANUPS.get(task.task_type)
+    if task.attempts > task.max_attempts:
+        # Reclaimed after a crash more times than allowed.
+        if cleanup:
+            cleanup(db, task)
+        set_task_failed(db, task, task.error_message or "task lease expired")
+        return
+    with TaskUnitOfWork(db, task) as uow:
+        if cleanup:
+            uow.on_failure(lambda: cleanup(db, task))
+        uow.result = handler(uow)
@@ -1,35 +1,256 @@
 import json
-from datetime import datetime
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta
 
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.config import get_settings
 from app.db.models import AsyncTask
+from app.services.task_events import publish_task_update
 
 
-def create_task(db: Session, user_id: int, task_type: str, project_id: int | None = None) -> AsyncTask:
-    task = AsyncTask(user_id=user_id, project_id=project_id, task_type=task_type, status="queued")
+logger = logging.getLogger(__name__)
+
+
+def new_task(
+    user_id: int,
+    task_type: str,
+    project_id: int | None = None,
+    payload: dict | None = None,
+) -> AsyncTask:
+    return AsyncTask(
+        user_id=user_id,
+        project_id=project_id,
+        task_type=task_type,
+        status="queued",
+        payload_json=json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+        max_attempts=get_settings().task_max_attempts,
+        run_after=datetime.utcnow(),
+    )
+
+
+def create_task(
+    db: Session,
+    user_id: int,
+    task_type: str,
+    project_id: int | None = None,
+    payload: dict | None = None,
+) -> AsyncTask:
+    task = new_task(user_id, task_type, project_id, payload)
     db.add(task)
     db.commit()
-    db.refresh(task)
     return task
 
 
-def set_task_running(db: Session, task: AsyncTask) -> None:
-    task.status = "running"
-    task.updated_at = datetime.utcnow()
+async def create_task_async(
+    db: AsyncSession,
+    user_id: int,
+    task_type: str,
+    project_id: int | None = None,
+    payload: dict | None = None,
+) -> AsyncTask:
+    task = new_task(user_id, task_type, project_id, payload)
+    db.add(task)
+    await db.commit()
+    return task
+
+
+def _claimable(now: datetime):
+    # Queued tasks whose backoff has elapsed, plus running tasks whose worker stopped heartbeating.
+    return or_(
+        and_(AsyncTask.status == "queued", AsyncTask.run_after <= now),
+        and_(AsyncTask.status == "running", AsyncTask.lease_expires_at < now),
+    )
+
+
+def claim_task(db: Session, task_types: list[str], worker_id: str) -> AsyncTask | None:
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=get_settings().worker_lease_seconds)
+    stmt = (
+        select(AsyncTask)
+        .where(AsyncTask.task_type.in_(task_types), _claimable(now))
+        .order_by(AsyncTask.id)
+        .limit(1)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        task = db.execute(stmt.with_for_update(skip_locked=True)).scalars().first()
+        if not task:
+            db.rollback()
+            return None
+        task.status = "running"
+        task.attempts += 1
+        task.locked_by = worker_id
+        task.lease_expires_at = lease_until
+        task.updated_at = now
+        db.commit()
+        publish_task_update(task.id)
+        return task
+
+    # SQLite has no row locks: claim with a compare-and-set update and let the lease decide ownership.
+    task_id = db.execute(stmt.with_only_columns(AsyncTask.id)).scalars().first()
+    if task_id is None:
+        db.rollback()
+        return None
+    result = db.execute(
+        update(AsyncTask)
+        .where(AsyncTask.id == task_id, _claimable(now))
+        .values(
+            status="running",
+            attempts=AsyncTask.attempts + 1,
+            locked_by=worker_id,
+            lease_expires_at=lease_until,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
     db.commit()
+    if result.rowcount != 1:
+        return None
+    publish_task_update(task_id)
+    # populate_existing: the session may already hold the row as it was before the claim.
+    return db.get(AsyncTask, task_id, populate_existing=True)
 
 
-def set_task_done(db: Session, task: AsyncTask, result: dict | list | None = None) -> None:
-    task.status = "done"
-    task.result_json = json.dumps(result or {}, ensure_ascii=False)
-    task.updated_at = datetime.utcnow()
+def heartbeat_task(db: Session, task_id: int, worker_id: str) -> bool:
+    lease_until = datetime.utcnow() + timedelta(seconds=get_settings().worker_lease_seconds)
+    result = db.execute(
+        update(AsyncTask)
+        .where(AsyncTask.id == task_id, AsyncTask.locked_by == worker_id, AsyncTask.status == "running")
+        .values(lease_expires_at=lease_until)
+        .execution_options(synchronize_session=False)
+    )
     db.commit()
+    return result.rowcount == 1
+
+
+class LeaseLost(RuntimeError):
+    # The task was reclaimed by another worker after this one's lease expired.
+    pass
+
+
+# (locked_by, attempts) of the claim a worker is executing; every status write is fenced on it.
+TaskOwner = tuple[str | None, int]
+
+
+def task_owner(task: AsyncTask) -> TaskOwner:
+    return task.locked_by, task.attempts
+
 
+def _write_task(db: Session, task: AsyncTask, owner: TaskOwner, values: dict) -> bool:
+    # UPDATE .. WHERE the claim is still ours. The values are mirrored onto `task` as already persisted,
+    # so the ORM does not write them again, unfenced, at the next flush.
+    locked_by, attempts = owner
+    result = db.execute(
+        update(AsyncTask)
+        .where(AsyncTask.id == task.id, AsyncTask.status == "running", AsyncTask.locked_by == locked_by, AsyncTask.attempts == attempts)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    for key, value in values.items():
+        set_committed_value(task, key, value)
+    return True
 
-def set_task_failed(db: Session, task: AsyncTask, error_message: str) -> None:
-    task.status = "failed"
-    task.error_message = error_message
-    task.updated_at = datetime.utcnow()
+
+def _finish(db: Session, task: AsyncTask, owner: TaskOwner, values: dict) -> bool:
+    # Final status and the stage's writes commit together, or not at all when the task was reclaimed.
+    if not _write_task(db, task, owner, values):
+        db.rollback()
+        logger.warning("task %s was reclaimed by another worker; discarding this attempt's writes", task.id)
+        return False
     db.commit()
+    publish_task_update(task.id)
+    return True
+
+
+def _done_values(result: dict | list | None) -> dict:
+    return {
+        "status": "done",
+        "result_json": json.dumps(result or {}, ensure_ascii=False),
+        "error_message": None,
+        "locked_by": None,
+        "lease_expires_at": None,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _failed_values(error_message: str) -> dict:
+    return {"status": "failed", "error_message": error_message, "locked_by": None, "lease_expires_at": None, "updated_at": datetime.utcnow()}
+
+
+def _retry_values(attempts: int, error_message: str) -> dict:
+    settings = get_settings()
+    delay = min(settings.task_retry_backoff_max_seconds, settings.task_retry_backoff_seconds * 2 ** max(0, attempts - 1))
+    now = datetime.utcnow()
+    return {
+        "status": "queued",
+        "error_message": error_message,
+        "run_after": now + timedelta(seconds=delay),
+        "locked_by": None,
+        "lease_expires_at": None,
+        "updated_at": now,
+    }
+
+
+def set_task_done(db: Session, task: AsyncTask, result: dict | list | None = None) -> bool:
+    return _finish(db, task, task_owner(task), _done_values(result))
+
+
+def set_task_failed(db: Session, task: AsyncTask, error_message: str) -> bool:
+    return _finish(db, task, task_owner(task), _failed_values(error_message))
+
+
+def set_task_retry(db: Session, task: AsyncTask, error_message: str) -> bool:
+    return _finish(db, task, task_owner(task), _retry_values(task.attempts, error_message))
+
+
+# One task stage: the domain writes made inside the block (flush only, no commit) and the final
+# task status land in a single commit. On error the stage is rolled back and the task is re-queued with
+# backoff, or failed for good, in one more commit; only in the latter case do on_failure hooks record
+# domain-side failure state. Every status write is fenced on the claim: once another worker has
+# reclaimed the task, this one's stage is rolled back instead of committed.
+class TaskUnitOfWork:
+    def __init__(self, db: Session, task: AsyncTask):
+        self.db = db
+        self.task = task
+        # Taken now: a rollback expires `task`, and reloading it would read the new owner's claim.
+        self.owner = task_owner(task)
+        self.max_attempts = task.max_attempts
+        self.result: dict | list | None = None
+        self._failure_hooks: list[Callable[[], None]] = []
+
+    def on_failure(self, hook: Callable[[], None]) -> None:
+        self._failure_hooks.append(hook)
+
+    def save_progress(self, progress: dict) -> None:
+        # Interim result of a long task, committed with the caller's next commit; replaced when the task finishes.
+        if not _write_task(self.db, self.task, self.owner, {"result_json": json.dumps(progress, ensure_ascii=False), "updated_at": datetime.utcnow()}):
+            raise LeaseLost(f"task {self.task.id} was reclaimed by another worker")
+
+    def __enter__(self) -> "TaskUnitOfWork":
+        return self
 
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is None:
+            _finish(self.db, self.task, self.owner, _done_values(self.result))
+            return False
+        self.db.rollback()
+        if isinstance(exc, LeaseLost):
+            logger.warning("%s; discarding this attempt's writes", exc)
+            return True
+        attempts = self.owner[1]
+        if isinstance(exc, ValueError) or attempts >= self.max_attempts:
+            # Bad input (missing project, empty text) will not get better on retry. Failure hooks only run
+            # here: a re-queued task may still succeed.
+            for hook in self._failure_hooks:
+                hook()
+            _finish(self.db, self.task, self.owner, _failed_values(str(exc)))
+        else:
+            logger.error("task %s (%s) failed on attempt %s", self.task.id, self.task.task_type, attempts, exc_info=exc)
+            _finish(self.db, self.task, self.owner, _retry_values(attempts, str(exc)))
+        return True
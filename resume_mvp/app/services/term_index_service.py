@@ -0,0 +1,118 @@
+import heapq
+import math
+from collections import Counter
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import ProjectTerm, ResumeProject
+from app.services.text_index import keyword_terms, term_counts
+
+
+# JD keywords are at least two characters, so single-character terms are never looked up.
+TERM_MIN_LEN = 2
+TERM_MAX_LEN = 64
+BM25_K1 = 1.2
+
+
+def _indexable(term: str) -> bool:
+    return TERM_MIN_LEN <= len(term) <= TERM_MAX_LEN
+
+
+def replace_project_terms(db: Session, project: ResumeProject, counts: Counter[str]) -> None:
+    # One DELETE and one executemany INSERT per project, in the caller's transaction.
+    db.execute(delete(ProjectTerm).where(ProjectTerm.project_id == project.id))
+    rows = [{"project_id": project.id, "user_id": project.user_id, "term": term, "tf": n} for term, n in counts.items() if _indexable(term)]
+    if rows:
+        db.execute(insert(ProjectTerm), rows)
+
+
+def delete_project_terms(db: Session, project_id: int) -> None:
+    db.execute(delete(ProjectTerm).where(ProjectTerm.project_id == project_id))
+
+
+def _rankable_where(user_id: int) -> tuple:
+    return (ResumeProject.user_id == user_id, ResumeProject.is_deleted.is_(False), ResumeProject.parse_status == 1)
+
+
+def rank_projects(db: Session, user_id: int, keywords: list[str], top_k: int) -> dict:
+    # BM25-style ranking of the user's parsed projects against JD keywords (k1 only; resumes are short
+    # enough that length normalisation is left out). Only the postings of the JD's terms are read, so the
+    # cost follows how many projects mention them, not the size of the resumes.
+    queries: dict[tuple[str, ...], str] = {}
+    for keyword in keywords:
+        terms = tuple(keyword_terms(keyword))
+        if terms and all(_indexable(t) for t in terms):
+            queries.setdefault(terms, keyword)
+    candidates = db.execute(select(func.count()).select_from(ResumeProject).where(*_rankable_where(user_id))).scalar_one()
+    result = {"keywords": list(queries.values()), "candidates": candidates, "items": []}
+    if not queries or not candidates:
+        return result
+
+    postings: dict[str, dict[int, int]] = {}
+    rows = db.execute(
+        select(ProjectTerm.term, ProjectTerm.project_id, ProjectTerm.tf)
+        .join(ResumeProject, ResumeProject.id == ProjectTerm.project_id)
+        .where(
+            ProjectTerm.user_id == user_id,
+            ProjectTerm.term.in_({t for terms in queries for t in terms}),
+            ResumeProject.is_deleted.is_(False),
+            ResumeProject.parse_status == 1,
+        )
+    )
+    for term, project_id, tf in rows:
+        postings.setdefault(term, {})[project_id] = tf
+
+    scores: dict[int, float] = {}
+    matched: dict[int, list[str]] = {}
+    for terms, keyword in queries.items():
+        # A keyword made of several terms (long CJK words) needs all of them; its tf is the rarest one's.
+        first, *rest = sorted((postings.get(t, {}) for t in terms), key=len)
+        hits = {pid: min([tf] + [other[pid] for other in rest]) for pid, tf in first.items() if all(pid in other for other in rest)}
+        idf = math.log(1 + (candidates - len(hits) + 0.5) / (len(hits) + 0.5))
+        for pid, tf in hits.items():
+            scores[pid] = scores.get(pid, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1)
+            matched.setdefault(pid, []).append(keyword)
+
+    top = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+    projects = {
+        p.id: p
+        for p in db.execute(
+            select(ResumeProject.id, ResumeProject.title, ResumeProject.target_role).where(ResumeProject.id.in_([pid for pid, _ in top]))
+        )
+    }
+    for pid, score in top:
+        found = set(matched[pid])
+        result["items"].append(
+            {
+                "project_id": pid,
+                "title": projects[pid].title,
+                "target_role": projects[pid].target_role,
+                "score": round(score, 4),
+                "coverage": round(100 * len(found) / len(queries)),
+                "matched_keywords": matched[pid],
+                "missing_keywords": [k for k in queries.values() if k not in found],
+            }
+        )
+    return result
+
+
+def reindex_projects(db: Session, chunk_size: int = 500, force: bool = False) -> dict:
+    # Backfill for projects parsed before the index existed (or all parsed projects with force),
+    # in id order, one commit per chunk.
+    state = {"indexed": 0}
+    last_id = 0
+    while True:
+        stmt = select(ResumeProject).where(ResumeProject.id > last_id, ResumeProject.is_deleted.is_(False), ResumeProject.parse_status == 1)
+        if not force:
+            stmt = stmt.where(~exists().where(ProjectTerm.project_id == ResumeProject.id))
+        projects = db.execute(stmt.order_by(ResumeProject.id).limit(chunk_size)).scalars().all()
+        if not projects:
+            break
+        for project in projects:
+            replace_project_terms(db, project, term_counts((project.source_text or "").strip()))
+        db.commit()
+        db.expunge_all()
+        last_id = projects[-1].id
+        state["indexed"] += len(projects)
+    return state
@@ -0,0 +1,76 @@
+import re
+from collections import Counter
+
+
+# Latin-script words keep the characters used in tech names (c++, c#, node.js, ci-cd);
+# CJK has no word boundaries, so runs are indexed as n-grams instead.
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+.#-]*|[\u4e00-\u9fa5]+")
+CJK_NGRAM_MAX = 4
+
+
+def _is_cjk(token: str) -> bool:
+    return "\u4e00" <= token[0] <= "\u9fa5"
+
+
+def build_token_index(text: str) -> set[str]:
+    index: set[str] = set()
+    for m in _TOKEN_RE.finditer(text.lower()):
+        token = m.group()
+        if _is_cjk(token):
+            size = len(token)
+            for n in range(1, min(size, CJK_NGRAM_MAX) + 1):
+                for i in range(size - n + 1):
+                    index.add(token[i : i + n])
+        else:
+            token = token.rstrip(".-")
+            if token:
+                index.add(token)
+    return index
+
+
+def term_counts(text: str) -> Counter[str]:
+    # Same terms as build_token_index, with how often each occurs (the inverted index stores both).
+    counts: Counter[str] = Counter()
+    for m in _TOKEN_RE.finditer(text.lower()):
+        token = m.group()
+        if _is_cjk(token):
+            size = len(token)
+            for n in range(1, min(size, CJK_NGRAM_MAX) + 1):
+                counts.update(token[i : i + n] for i in range(size - n + 1))
+        else:
+            token = token.rstrip(".-")
+            if token:
+                counts[token] += 1
+    return counts
+
+
+def keyword_terms(keyword: str) -> list[str]:
+    # Index terms that must all be present for `keyword` to count as contained in the text.
+    # CJK runs longer than CJK_NGRAM_MAX are checked through their overlapping max-size windows.
+    terms: list[str] = []
+    for m in _TOKEN_RE.finditer(keyword.lower()):
+        token = m.group()
+        if _is_cjk(token):
+            if len(token) <= CJK_NGRAM_MAX:
+                terms.append(token)
+            else:
+                terms.extend(token[i : i + CJK_NGRAM_MAX] for i in range(len(token) - CJK_NGRAM_MAX + 1))
+        else:
+            token = token.rstrip(".-")
+            if token:
+                terms.append(token)
+    return terms
+
+
+def contains_keyword(index: set[str] | frozenset[str], keyword: str) -> bool:
+    terms = keyword_terms(keyword)
+    return bool(terms) and all(t in index for t in terms)
+
+
+def dump_token_index(index: set[str]) -> str:
+    # Terms never contain whitespace, so a space-joined string is the compact persisted form.
+    return " ".join(sorted(index))
+
+
+def load_token_index(raw: str) -> frozenset[str]:
+    return frozenset(raw.split())
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.services.project_service import ensure_storage_dirs
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+@dataclass
+class StoredUpload:
+    file_path: str
+    filename: str
+    size: int
+    sha256: str
+
+
+def safe_filename(filename: str | None) -> str:
+    name = os.path.basename((filename or "").replace("\\", "/")) or "upload"
+    return re.sub(r"[^\w.\-]+", "_", name)[-120:]
+
+
+def _write_chunk(f: BinaryIO, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    f.write(chunk)
+
+
+async def store_upload(file: UploadFile, max_bytes: int | None = None, private: bool = False) -> StoredUpload:
+    # Streams the upload to storage_dir/uploads in bounded chunks; hashing and disk writes run in the
+    # threadpool so the event loop only shuttles chunks. Files are named by content hash, so identical
+    # uploads share one file; `private` gives this upload a file of its own, for callers that delete it.
+    settings = get_settings()
+    max_bytes = max_bytes or settings.max_upload_bytes
+    await run_in_threadpool(ensure_storage_dirs)
+    upload_dir = os.path.join(settings.storage_dir, "uploads")
+    tmp_path = os.path.join(upload_dir, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    f = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        while chunk := await file.read(settings.upload_chunk_bytes):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"file exceeds {max_bytes} bytes")
+            await run_in_threadpool(_write_chunk, f, digest, chunk)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        await run_in_threadpool(os.remove, tmp_path)
+        raise
+    await run_in_threadpool(f.close)
+
+    filename = safe_filename(file.filename)
+    sha256 = digest.hexdigest()
+    file_path = os.path.join(upload_dir, f"{uuid.uuid4().hex if private else sha256[:32]}_{filename}")
+    await run_in_threadpool(os.replace, tmp_path, file_path)
+    return StoredUpload(file_path=file_path, filename=filename, size=size, sha256=sha256)
@@ -0,0 +1,108 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.db.session import SessionLocal, engine, track_db_calls
+from app.services.task_runner import TASK_HANDLERS, execute_task
+from app.services.task_service import claim_task, heartbeat_task
+
+
+logger = logging.getLogger("app.worker")
+
+
+def _heartbeat(task_id: int, worker_id: str, stop: threading.Event) -> None:
+    interval = max(1.0, get_settings().worker_lease_seconds / 3)
+    while not stop.wait(interval):
+        db = SessionLocal()
+        try:
+            if not heartbeat_task(db, task_id, worker_id):
+                return
+        except Exception:
+            logger.exception("heartbeat failed for task %s", task_id)
+        finally:
+            db.close()
+
+
+def run_once(task_types: list[str], worker_id: str) -> bool:
+    db = SessionLocal()
+    try:
+        task = claim_task(db, task_types, worker_id)
+        if task is None:
+            return False
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(task.id, worker_id, stop), daemon=True)
+        beat.start()
+        stats = track_db_calls()
+        try:
+            execute_task(db, task)
+        finally:
+            stop.set()
+            beat.join()
+        logger.info(
+            "task %s (%s) -> %s: %s statements, %s commits",
+            task.id, task.task_type, task.status, stats.statements, stats.commits,
+        )
+        return True
+    finally:
+        db.close()
+
+
+def run_worker(task_types: list[str], worker_id: str, stop: threading.Event | None = None) -> None:
+    # Connections inherited from the parent process must not be shared.
+    engine.dispose(close=False)
+    stop = stop or threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    settings = get_settings()
+    logger.info("worker %s started for %s", worker_id, ",".join(task_types))
+    next_metrics_log = time.monotonic() + settings.worker_metrics_log_interval_seconds
+    while not stop.is_set():
+        if time.monotonic() >= next_metrics_log:
+            logger.info("worker %s counters: %s", worker_id, metrics.snapshot())
+            next_metrics_log = time.monotonic() + settings.worker_metrics_log_interval_seconds
+        try:
+            if run_once(task_types, worker_id):
+                continue
+        except Exception:
+            logger.exception("worker %s loop error", worker_id)
+        stop.wait(settings.worker_poll_interval_seconds)
+    logger.info("worker %s stopped, counters: %s", worker_id, metrics.snapshot())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the async task worker pool.")
+    parser.add_argument("--types", nargs="*", help="task types to serve (default: all configured)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    concurrency = get_settings().worker_concurrency
+    task_types = args.types or [t for t in concurrency if t in TASK_HANDLERS]
+    host = f"{socket.gethostname()}:{os.getpid()}"
+    procs: list[multiprocessing.Process] = []
+    for task_type in task_types:
+        for slot in range(max(1, concurrency.get(task_type, 1))):
+            worker_id = f"{host}:{task_type}:{slot}"
+            proc = multiprocessing.Process(target=run_worker, args=([task_type], worker_id), name=worker_id)
+            proc.start()
+            procs.append(proc)
+
+    def shutdown(*_):
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    while any(proc.is_alive() for proc in procs):
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    main()
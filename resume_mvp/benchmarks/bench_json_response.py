@@ -0,0 +1,81 @@
+# Compare rendering the project-detail envelope through FastAPI's default path (jsonable_encoder + json)
+# with the orjson `ok()` helper and with serving a stored snapshot body as is.
+# Run from resume_mvp/: python -m benchmarks.bench_json_response
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.conditional import raw_json_response
+from app.api.responses import ok
+from app.services.snapshot_service import render_detail
+
+
+BODY = [
+    "负责 FastAPI 服务开发，QPS 提升 30%，接口 P99 从 800ms 降到 120ms",
+    "Built data pipelines on Kafka and Flink processing 2B events/day",
+    "使用 MySQL、Redis 以及 Docker 完成微服务拆分与容器化部署",
+    "Led a team of 5 engineers delivering the billing platform on time",
+]
+
+
+def project_detail_payload(section_chars: int, sections: int = 8, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+
+    def text() -> str:
+        lines: list[str] = []
+        while sum(len(x) for x in lines) < section_chars:
+            lines.append(rng.choice(BODY))
+        return "\n".join(lines)
+
+    return {
+        "project": {"id": 1, "title": "张三 - 后端工程师", "target_role": "Python 后端", "target_city": "上海", "years_experience": 5, "parse_status": 1},
+        "sections": [
+            {"id": i + 1, "section_type": i % 5 + 1, "origin_text": text(), "optimized_text": text(), "is_accepted": False}
+            for i in range(sections)
+        ],
+        "score": {"ats_score": 70, "completeness_score": 95, "match_score": 88, "issues": ["简历内容偏短，建议补充可量化成果。"] * 3},
+        "jd_profile": {"keywords": ["python", "fastapi", "kafka"] * 10, "missing_keywords": ["kubernetes", "良好沟通"]},
+    }
+
+
+def default_path(data: dict) -> bytes:
+    return JSONResponse(jsonable_encoder({"code": 0, "message": "ok", "data": data})).body
+
+
+def orjson_path(data: dict) -> bytes:
+    return ok(data).body
+
+
+def bench(fn, arg, seconds: float = 1.0) -> float:
+    # Renders per second, best of three runs.
+    best = 0.0
+    for _ in range(3):
+        count = 0
+        start = time.perf_counter()
+        while (elapsed := time.perf_counter() - start) < seconds / 3:
+            fn(arg)
+            count += 1
+        best = max(best, count / elapsed)
+    return best
+
+
+def main() -> None:
+    for label, section_chars in [("4KB", 500), ("64KB", 8000), ("512KB", 64000)]:
+        data = project_detail_payload(section_chars)
+        assert json.loads(default_path(data)) == json.loads(orjson_path(data))
+        snapshot = render_detail(data)
+        assert snapshot == orjson_path(data)
+        default = bench(default_path, data)
+        fast = bench(orjson_path, data)
+        raw = bench(lambda body: raw_json_response(body, '"etag"').body, snapshot)
+        print(
+            f"{label:>6}: jsonable_encoder+json {default:9.0f}/s  orjson ok() {fast:9.0f}/s ({fast / default:5.1f}x)"
+            f"  snapshot {raw:9.0f}/s ({raw / default:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
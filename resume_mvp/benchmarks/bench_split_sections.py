@@ -0,0 +1,85 @@
+# Compare split_sections against the previous line x group x key scan.
+# Run from resume_mvp/: python -m benchmarks.bench_split_sections
+import random
+import time
+
+from app.services.project_service import split_sections
+
+
+def split_sections_legacy(text: str) -> list[tuple[str, str]]:
+    markers = [
+        ("education", ["教育", "education"]),
+        ("experience", ["工作经历", "experience", "经历"]),
+        ("project", ["项目经历", "projects", "project"]),
+        ("skills", ["技能", "skills"]),
+    ]
+    lines = [x.strip() for x in text.splitlines() if x.strip()]
+    if not lines:
+        return [("profile", text)]
+
+    out: list[tuple[str, str]] = []
+    current_type = "profile"
+    buf: list[str] = []
+    for line in lines:
+        lowered = line.lower()
+        matched = None
+        for name, keys in markers:
+            if any(key in lowered for key in keys):
+                matched = name
+                break
+        if matched:
+            if buf:
+                out.append((current_type, "\n".join(buf)))
+            current_type = matched
+            buf = []
+            continue
+        buf.append(line)
+    if buf:
+        out.append((current_type, "\n".join(buf)))
+    if not out:
+        out.append(("profile", text))
+    return out
+
+
+HEADINGS = ["教育背景", "Education", "工作经历", "Work Experience", "项目经历", "Projects", "专业技能", "Skills"]
+BODY = [
+    "负责核心交易系统的设计与开发，接口平均延迟降低 35%",
+    "Built a FastAPI service handling 2k QPS with Redis caching and PostgreSQL",
+    "主导数据平台迁移，覆盖 120 个业务报表，节省 40 万元/年",
+    "Mentored 4 junior engineers and introduced code review guidelines",
+    "  ",
+    "熟悉 Python、Go、Docker、Kubernetes，了解前端 React 开发",
+]
+
+
+def synthetic_resume(size: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    parts: list[str] = []
+    total = 0
+    while total < size:
+        line = rng.choice(HEADINGS) if rng.random() < 0.05 else rng.choice(BODY)
+        parts.append(line)
+        total += len(line.encode("utf-8")) + 1
+    return "\n".join(parts)
+
+
+def bench(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    for label, size, repeat in [("10KB", 10 * 1024, 200), ("1MB", 1024 * 1024, 5)]:
+        text = synthetic_resume(size)
+        assert split_sections(text) == split_sections_legacy(text)
+        legacy = bench(split_sections_legacy, text, repeat)
+        compiled = bench(split_sections, text, repeat)
+        print(f"{label:>5}: legacy {legacy * 1000:8.2f} ms  compiled {compiled * 1000:8.2f} ms  speedup {legacy / compiled:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
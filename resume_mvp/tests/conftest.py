@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+# Settings are read when app modules are imported, so the test database and storage are set up first.
+_tmp = tempfile.mkdtemp(prefix="resume_mvp_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["STORAGE_DIR"] = os.path.join(_tmp, "data")
+
+import pytest  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.models import User  # noqa: E402
+from app.db.session import SessionLocal, engine, init_db  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="tester@example.com")
+    db.add(user)
+    db.commit()
+    return user
@@ -0,0 +1,35 @@
+import pytest
+
+from app.services import auth_service
+from app.services.auth_service import resolve_principal, set_user_status
+
+
+@pytest.fixture(autouse=True)
+def empty_principal_cache():
+    auth_service._principals.clear()
+    yield
+    auth_service._principals.clear()
+
+
+def test_principal_is_cached(db, user):
+    assert resolve_principal(db, user.id).email == user.email
+    db.delete(user)
+    db.commit()
+    assert resolve_principal(db, user.id).email == user.email
+
+
+def test_status_change_from_another_process_evicts_cached_principal(db, user, monkeypatch):
+    monkeypatch.setattr(auth_service._settings, "auth_principal_invalidation_poll_seconds", 3600)
+    monkeypatch.setattr(auth_service, "_invalidation_due", 0.0)
+    assert resolve_principal(db, user.id) is not None
+
+    # Same as app.cli set-user-status: it never touches this process's cache.
+    set_user_status(db, user.id, 0)
+    assert resolve_principal(db, user.id) is not None, "next check is not due yet"
+
+    monkeypatch.setattr(auth_service, "_invalidation_due", 0.0)
+    assert resolve_principal(db, user.id) is None
+
+    set_user_status(db, user.id, 1)
+    monkeypatch.setattr(auth_service, "_invalidation_due", 0.0)
+    assert resolve_principal(db, user.id).email == user.email
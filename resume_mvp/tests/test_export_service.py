@@ -0,0 +1,39 @@
+import os
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.models import ExportFile, ResumeProject, ResumeSection
+from app.services.export_service import export_project_to_pdf
+from app.services.project_service import project_values
+
+
+def _project(db, user) -> ResumeProject:
+    project = ResumeProject(**project_values(user.id, "v1", "Go", None, None, 2, "text"))
+    db.add(project)
+    db.flush()
+    db.add(ResumeSection(project_id=project.id, section_type=3, origin_text="负责 FastAPI 服务开发"))
+    db.commit()
+    return project
+
+
+def _export(db, project: ResumeProject, title: str) -> ExportFile:
+    project.title = title
+    export = export_project_to_pdf(db, project)
+    db.commit()
+    return export
+
+
+def test_retention_keeps_the_most_recently_used_exports(db, user, monkeypatch):
+    monkeypatch.setattr(get_settings(), "export_retention_per_project", 2)
+    project = _project(db, user)
+    first = _export(db, project, "v1")
+    second = _export(db, project, "v2")
+
+    # v1 is served again from its file, so it outlives the newer v2.
+    assert _export(db, project, "v1").id == first.id
+    third = _export(db, project, "v3")
+
+    kept = db.execute(select(ExportFile.id).where(ExportFile.project_id == project.id).order_by(ExportFile.id)).scalars().all()
+    assert kept == [first.id, third.id]
+    assert os.path.exists(first.file_path) and not os.path.exists(second.file_path)
@@ -0,0 +1,139 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.models import ResumeProject
+from app.services.extract_service import shutdown_extract_pool
+from app.services.import_service import ImportFormatError, import_projects
+from app.services.upload_service import store_upload
+
+
+RESUME = "张三 zhangsan@example.com\n工作经历\n负责 FastAPI 服务开发\n专业技能\nPython, SQL, Docker\n"
+
+
+def _write_jsonl(tmp_path, records: list) -> str:
+    path = tmp_path / "import.jsonl"
+    path.write_text("\n".join(r if isinstance(r, str) else json.dumps(r, ensure_ascii=False) for r in records) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _titles(db, user_id: int) -> list[str]:
+    return db.execute(select(ResumeProject.title).where(ResumeProject.user_id == user_id).order_by(ResumeProject.id)).scalars().all()
+
+
+def test_jsonl_bad_lines_are_reported_per_line(db, user, tmp_path):
+    path = _write_jsonl(
+        tmp_path,
+        [
+            {"title": "ok 1", "source_text": RESUME},
+            "{not json",
+            "[1, 2]",
+            {"title": "no text"},
+            {"title": "blank text", "source_text": "   "},
+            {"title": "long city", "source_text": RESUME, "target_city": "x" * 101},
+            {"title": "negative years", "source_text": RESUME, "years_experience": -1},
+            {"title": "text not a string", "source_text": 42},
+            "",
+            {"title": "ok 2", "source_text": RESUME, "target_role": "Go", "years_experience": 3},
+        ],
+    )
+
+    progress = import_projects(db, user.id, path, "jsonl", target_role="Python 后端")
+
+    assert progress["created"] == 2
+    assert progress["failed"] == 7
+    assert progress["processed"] == 9
+    assert [e["item"] for e in progress["errors"]] == [f"line {n}" for n in range(2, 9)]
+    assert "target_city" in progress["errors"][4]["error"]
+    assert "years_experience" in progress["errors"][5]["error"]
+    projects = db.execute(select(ResumeProject).where(ResumeProject.user_id == user.id).order_by(ResumeProject.id)).scalars().all()
+    assert [(p.title, p.target_role, p.years_experience) for p in projects] == [("ok 1", "Python 后端", None), ("ok 2", "Go", 3)]
+
+
+def test_jsonl_import_resumes_after_last_committed_batch(db, user, tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "import_batch_size", 2)
+    path = _write_jsonl(tmp_path, [{"title": f"r{i}", "source_text": RESUME} if i != 3 else "{bad" for i in range(7)])
+    saved = []
+
+    def interrupt_second_batch(progress: dict) -> None:
+        if saved:
+            raise RuntimeError("worker lost")
+        saved.append(json.loads(json.dumps(progress)))
+
+    with pytest.raises(RuntimeError):
+        import_projects(db, user.id, path, "jsonl", "Python 后端", on_batch=interrupt_second_batch)
+    db.rollback()
+    assert saved == [{"processed": 2, "created": 2, "failed": 0, "errors": []}]
+    assert _titles(db, user.id) == ["r0", "r1"]
+
+    progress = import_projects(db, user.id, path, "jsonl", "Python 后端", progress=saved[0])
+
+    assert progress == {"processed": 7, "created": 6, "failed": 1, "errors": [{"item": "line 4", "error": progress["errors"][0]["error"]}]}
+    assert _titles(db, user.id) == ["r0", "r1", "r2", "r4", "r5", "r6"]
+
+
+def test_zip_import_reports_bad_members_and_keeps_no_partial_files(db, user, tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "max_upload_bytes", 1024)
+    path = tmp_path / "resumes.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("a/first.txt", RESUME)
+        zf.writestr("photo.png", b"\x89PNG")
+        zf.writestr("empty.txt", b"   ")
+        zf.writestr("huge.txt", "x" * 2048)
+        zf.writestr("second.txt", RESUME)
+    try:
+        progress = import_projects(db, user.id, str(path), "zip", target_role="Python 后端", chain="parse")
+    finally:
+        shutdown_extract_pool()
+
+    assert progress["created"] == 2
+    assert [e["item"] for e in progress["errors"]] == ["photo.png", "empty.txt", "huge.txt"]
+    projects = db.execute(select(ResumeProject).where(ResumeProject.user_id == user.id).order_by(ResumeProject.id)).scalars().all()
+    assert [(p.title, p.source_type, p.parse_status) for p in projects] == [("first", 1, 1), ("second", 1, 1)]
+    dest_dir = os.path.dirname(projects[0].source_file_url)
+    assert sorted(os.listdir(dest_dir)) == sorted(os.path.basename(p.source_file_url) for p in projects)
+
+
+def test_zip_import_rejects_bad_archives(db, user, tmp_path):
+    not_zip = tmp_path / "resumes.zip"
+    not_zip.write_bytes(b"plain text")
+    with pytest.raises(ImportFormatError):
+        import_projects(db, user.id, str(not_zip), "zip", target_role="Python 后端")
+
+    archive = tmp_path / "ok.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("first.txt", RESUME)
+    with pytest.raises(ImportFormatError):
+        import_projects(db, user.id, str(archive), "zip", target_role=None)
+    assert _titles(db, user.id) == []
+
+
+def test_imports_of_the_same_archive_do_not_share_files(db, user, tmp_path):
+    path = tmp_path / "resumes.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("first.txt", RESUME)
+    try:
+        for key in ("task1", "task2", None):
+            import_projects(db, user.id, str(path), "zip", target_role="Python 后端", unpack_key=key)
+    finally:
+        shutdown_extract_pool()
+
+    files = db.execute(select(ResumeProject.source_file_url).where(ResumeProject.user_id == user.id).order_by(ResumeProject.id)).scalars().all()
+    assert len(set(files)) == 3
+    assert [os.path.basename(os.path.dirname(f)) for f in files[:2]] == ["import_task1", "import_task2"]
+
+
+def test_private_uploads_get_their_own_file():
+    def store(private: bool) -> str:
+        return asyncio.run(store_upload(UploadFile(io.BytesIO(b"same bytes"), filename="a.zip"), private=private)).file_path
+
+    assert store(private=False) == store(private=False)
+    first, second = store(private=True), store(private=True)
+    assert first != second and os.path.exists(first) and os.path.exists(second)
@@ -0,0 +1,49 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.migrations import upgrade_schema
+from app.db.models import AsyncTask
+
+
+OLD_ASYNC_TASKS = """
+CREATE TABLE async_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    project_id INTEGER,
+    task_type VARCHAR(32) NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    error_message TEXT,
+    result_json TEXT,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+)
+"""
+
+
+def test_upgrade_adds_missing_columns_to_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "async_tasks"])
+    with engine.begin() as conn:
+        conn.execute(text(OLD_ASYNC_TASKS))
+        conn.execute(
+            text("INSERT INTO async_tasks (user_id, task_type, status, created_at, updated_at) VALUES (1, 'parse', 'queued', '2024-01-01', '2024-01-01')")
+        )
+
+    applied = upgrade_schema(engine)
+
+    assert "added column async_tasks.attempts" in applied
+    assert "created index ix_async_tasks_claim" in applied
+    assert {c.name for c in AsyncTask.__table__.columns} <= {c["name"] for c in inspect(engine).get_columns("async_tasks")}
+    with Session(engine) as db:
+        task = db.get(AsyncTask, 1)
+        assert (task.attempts, task.max_attempts, task.locked_by) == (0, 3, None)
+    assert upgrade_schema(engine) == []
+    engine.dispose()
+
+
+def test_upgrade_is_a_no_op_on_a_new_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/new.db")
+    Base.metadata.create_all(engine)
+    assert upgrade_schema(engine) == []
+    engine.dispose()
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.db.models import ResumeProject
+from app.main import app
+from app.services import auth_service
+from app.services.project_service import project_values, touch_project
+
+
+@pytest.fixture
+def client(db, user):
+    # User ids restart with every test database; a principal cached by an earlier test must not leak in.
+    auth_service._principals.clear()
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token(str(user.id))}"
+    yield client
+    auth_service._principals.clear()
+
+
+def _projects(db, user, count: int) -> list[ResumeProject]:
+    projects = [ResumeProject(**project_values(user.id, f"p{i}", "Go", None, None, 2, "text")) for i in range(count)]
+    db.add_all(projects)
+    db.commit()
+    return projects
+
+
+def test_project_detail_is_not_modified_until_the_project_changes(db, user, client):
+    project = _projects(db, user, 1)[0]
+    first = client.get(f"/api/v1/projects/{project.id}")
+    assert first.status_code == 200 and first.json()["data"]["project"]["title"] == "p0"
+
+    cached = client.get(f"/api/v1/projects/{project.id}", headers={"If-None-Match": first.headers["etag"]})
+    assert (cached.status_code, cached.content, cached.headers["etag"]) == (304, b"", first.headers["etag"])
+
+    project.title = "renamed"
+    touch_project(project)
+    db.commit()
+    changed = client.get(f"/api/v1/projects/{project.id}", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
+    assert changed.json()["data"]["project"]["title"] == "renamed"
+
+
+def test_project_list_accepts_weak_and_listed_validators(db, user, client):
+    _projects(db, user, 2)
+    etag = client.get("/api/v1/projects").headers["etag"]
+
+    assert client.get("/api/v1/projects", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    _projects(db, user, 1)
+    assert client.get("/api/v1/projects", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_project_list_pages_with_a_cursor(db, user, client):
+    projects = _projects(db, user, 5)
+    projects[2].is_deleted = True
+    db.commit()
+
+    pages, cursor = [], None
+    while True:
+        data = client.get("/api/v1/projects", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()["data"]
+        pages.append([item["title"] for item in data["items"]])
+        if (cursor := data["next_cursor"]) is None:
+            break
+    assert pages == [["p4", "p3"], ["p1", "p0"]]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "!!", "eA"])
+def test_malformed_cursor_is_a_bad_request(db, user, client, cursor):
+    response = client.get("/api/v1/projects", params={"cursor": cursor})
+    assert (response.status_code, response.json()["detail"]) == (400, "invalid cursor")
@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import role_taxonomy
+from app.services.role_taxonomy import DEFAULT_TAXONOMY_PATH, get_taxonomy, load_taxonomy, normalize_role
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return load_taxonomy(DEFAULT_TAXONOMY_PATH)
+
+
+def test_normalize_role():
+    assert normalize_role("Python 后端-开发") == "python后端开发"
+    assert normalize_role("  Senior_Java / Engineer ") == "senior java engineer"
+
+
+@pytest.mark.parametrize(
+    "target_role, role_id",
+    [
+        ("Python 后端", "python_backend"),
+        ("高级Python数据分析师", "data_analyst"),
+        ("python 数据分析师", "data_analyst"),
+        ("Senior Java Engineer", "java_backend"),
+        ("golang", "go_backend"),
+        ("python3 developer", "python_backend"),
+        ("Python3开发", "python_backend"),
+        ("java8 engineer", "java_backend"),
+        ("vue3", "frontend"),
+        ("k8s运维", "devops"),
+        ("pythonista", "general"),
+        ("management", "general"),
+        ("", "general"),
+    ],
+)
+def test_resolve(taxonomy, target_role, role_id):
+    assert taxonomy.resolve(target_role).id == role_id
+
+
+def test_resolve_is_cached(taxonomy):
+    assert taxonomy.resolve("Go 开发") is taxonomy.resolve("Go 开发")
+
+
+def _write_taxonomy(path, alias: str, mtime: int) -> None:
+    data = {"default_role": "general", "roles": [{"id": "custom", "aliases": [alias], "keywords": {"rust": 1}}, {"id": "general"}]}
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_edited_file_is_reloaded_and_broken_edit_is_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "taxonomy.json"
+    _write_taxonomy(path, "rust", 1_000_000)
+    monkeypatch.setattr(get_settings(), "role_taxonomy_path", str(path))
+    monkeypatch.setattr(get_settings(), "role_taxonomy_reload_seconds", 0)
+    monkeypatch.setattr(role_taxonomy, "_taxonomy", None)
+    monkeypatch.setattr(role_taxonomy, "_taxonomy_mtime", None)
+
+    first = get_taxonomy()
+    assert first.resolve("rust developer").id == "custom"
+    assert get_taxonomy() is first
+
+    _write_taxonomy(path, "zig", 1_000_100)
+    second = get_taxonomy()
+    assert second.version != first.version
+    assert second.resolve("rust developer").id == "general"
+    assert second.resolve("zig developer").id == "custom"
+
+    path.write_text("{broken", encoding="utf-8")
+    os.utime(path, (1_000_200, 1_000_200))
+    assert get_taxonomy() is second
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.models import AsyncTask, ResumeProject
+from app.db.session import SessionLocal
+from app.services import task_runner
+from app.services.project_service import project_values
+from app.services.task_runner import execute_task
+from app.services.task_service import TaskUnitOfWork, claim_task, create_task, heartbeat_task
+
+
+@pytest.fixture
+def other_db(db):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def _expire_lease(db, task_id: int) -> None:
+    db.get(AsyncTask, task_id).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+
+def _reclaimed_task(db, other_db, user):
+    # Worker "a" claims the task, its lease runs out and worker "b" takes it over.
+    task = create_task(db, user.id, "parse")
+    claimed = claim_task(db, ["parse"], "a")
+    _expire_lease(other_db, task.id)
+    assert claim_task(other_db, ["parse"], "b").id == task.id
+    return claimed
+
+
+def _stored(db, task_id: int) -> AsyncTask:
+    db.expire_all()
+    return db.get(AsyncTask, task_id)
+
+
+def test_stale_worker_does_not_overwrite_reclaimed_task(db, other_db, user):
+    claimed = _reclaimed_task(db, other_db, user)
+
+    with TaskUnitOfWork(db, claimed) as uow:
+        db.add(ResumeProject(**project_values(user.id, "written by a", "Go", None, None, 2, "text")))
+        uow.result = {"by": "a"}
+
+    task = _stored(other_db, claimed.id)
+    assert (task.status, task.locked_by, task.attempts, task.result_json) == ("running", "b", 2, None)
+    assert db.execute(select(ResumeProject)).first() is None
+    assert not heartbeat_task(db, claimed.id, "a")
+
+
+def test_stale_worker_failure_does_not_requeue_reclaimed_task(db, other_db, user):
+    claimed = _reclaimed_task(db, other_db, user)
+
+    with TaskUnitOfWork(db, claimed):
+        raise ValueError("bad input")
+
+    task = _stored(other_db, claimed.id)
+    assert (task.status, task.locked_by, task.error_message) == ("running", "b", None)
+
+
+def test_progress_of_stale_worker_is_rejected(db, other_db, user):
+    claimed = _reclaimed_task(db, other_db, user)
+
+    saved = False
+    with TaskUnitOfWork(db, claimed) as uow:
+        uow.save_progress({"processed": 10})
+        saved = True
+
+    assert not saved
+    assert _stored(other_db, claimed.id).result_json is None
+
+
+def test_owner_finishes_task(db, user):
+    create_task(db, user.id, "parse")
+    claimed = claim_task(db, ["parse"], "a")
+
+    with TaskUnitOfWork(db, claimed) as uow:
+        uow.save_progress({"processed": 1})
+        uow.result = {"section_count": 3}
+
+    task = _stored(db, claimed.id)
+    assert (task.status, task.locked_by, task.lease_expires_at, task.result_json) == ("done", None, None, '{"section_count": 3}')
+
+
+def _parse_task(db, user, attempts: int = 0):
+    project = ResumeProject(**project_values(user.id, "t", "Go", None, None, 2, "text"))
+    db.add(project)
+    db.flush()
+    task = create_task(db, user.id, "parse", project.id)
+    task.attempts = attempts
+    db.commit()
+    return project, claim_task(db, ["parse"], "a")
+
+
+def test_parse_task_failing_after_lease_expiry_marks_project_failed(db, user):
+    project, claimed = _parse_task(db, user, attempts=3)
+
+    execute_task(db, claimed)
+
+    task = _stored(db, claimed.id)
+    assert (task.status, task.error_message) == ("failed", "task lease expired")
+    assert db.get(ResumeProject, project.id).parse_status == 2
+
+
+def test_parse_task_failing_on_last_attempt_marks_project_failed(db, user, monkeypatch):
+    project, claimed = _parse_task(db, user, attempts=2)
+    monkeypatch.setattr(task_runner, "parse_project", lambda db, project: 1 / 0)
+
+    execute_task(db, claimed)
+
+    assert _stored(db, claimed.id).status == "failed"
+    assert db.get(ResumeProject, project.id).parse_status == 2
+
+
+def test_transient_errors_back_off_then_fail_after_max_attempts(db, user, monkeypatch):
+    monkeypatch.setattr(get_settings(), "task_retry_backoff_seconds", 5)
+    task_id = create_task(db, user.id, "parse").id
+    hooks, delays = [], []
+    for _ in range(3):
+        claimed = claim_task(db, ["parse"], "a")
+        assert claimed.id == task_id
+        with TaskUnitOfWork(db, claimed) as uow:
+            uow.on_failure(lambda: hooks.append(True))
+            db.add(ResumeProject(**project_values(user.id, "partial", "Go", None, None, 2, "text")))
+            raise RuntimeError("transient")
+        task = _stored(db, task_id)
+        if task.status == "queued":
+            delays.append(round((task.run_after - task.updated_at).total_seconds()))
+            assert claim_task(db, ["parse"], "a") is None, "backoff has not elapsed"
+            task.run_after = datetime.utcnow()
+            db.commit()
+
+    assert delays == [5, 10]
+    assert (task.status, task.attempts, task.error_message, task.locked_by) == ("failed", 3, "transient", None)
+    assert hooks == [True]
+    assert db.execute(select(ResumeProject)).first() is None
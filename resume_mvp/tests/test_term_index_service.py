@@ -0,0 +1,81 @@
+from sqlalchemy import delete, func, select
+
+from app.db.models import ProjectTerm, ResumeProject, User
+from app.services.project_service import parse_project, project_values
+from app.services.term_index_service import rank_projects, reindex_projects
+
+
+def _add_project(db, user_id: int, title: str, source_text: str, parse: bool = True) -> ResumeProject:
+    project = ResumeProject(**project_values(user_id, title, "后端", None, None, 2, source_text))
+    db.add(project)
+    db.flush()
+    if parse:
+        parse_project(db, project)
+    return project
+
+
+def _ranked_titles(db, user_id: int, keywords: list[str], top_k: int = 10) -> list[str]:
+    return [item["title"] for item in rank_projects(db, user_id, keywords, top_k)["items"]]
+
+
+def test_rank_orders_by_keyword_score(db, user):
+    _add_project(db, user.id, "python only", "熟悉 Python 开发")
+    _add_project(db, user.id, "python kafka", "熟悉 Python 和 Kafka，Kafka 集群运维")
+    _add_project(db, user.id, "python kafka redis", "Python Kafka Redis 微服务")
+    _add_project(db, user.id, "unrelated", "产品经理 需求分析")
+    db.commit()
+
+    result = rank_projects(db, user.id, ["Python", "Kafka", "Redis", "x"], 10)
+
+    # "x" is shorter than any indexed term and is left out of the query.
+    assert result["keywords"] == ["Python", "Kafka", "Redis"]
+    assert result["candidates"] == 4
+    assert [item["title"] for item in result["items"]] == ["python kafka redis", "python kafka", "python only"]
+    best = result["items"][0]
+    assert best["coverage"] == 100 and best["missing_keywords"] == []
+    assert result["items"][2]["matched_keywords"] == ["Python"]
+    assert result["items"][2]["missing_keywords"] == ["Kafka", "Redis"]
+    assert _ranked_titles(db, user.id, ["Python", "Kafka", "Redis"], top_k=1) == ["python kafka redis"]
+
+
+def test_rank_matches_cjk_keywords_and_breaks_ties_by_id(db, user):
+    _add_project(db, user.id, "first", "负责推荐系统的特征工程")
+    _add_project(db, user.id, "second", "参与推荐系统上线")
+    _add_project(db, user.id, "partial", "推荐算法 系统设计")
+    db.commit()
+
+    assert _ranked_titles(db, user.id, ["推荐系统"]) == ["first", "second"]
+
+
+def test_rank_skips_deleted_unparsed_and_other_users_projects(db, user):
+    other = User(email="other@example.com")
+    db.add(other)
+    db.flush()
+    _add_project(db, user.id, "kept", "Python Redis")
+    _add_project(db, user.id, "deleted", "Python Redis").is_deleted = True
+    _add_project(db, user.id, "unparsed", "Python Redis", parse=False)
+    _add_project(db, other.id, "other user", "Python Redis")
+    db.commit()
+
+    result = rank_projects(db, user.id, ["Python", "Redis"], 10)
+
+    assert result["candidates"] == 1
+    assert [item["title"] for item in result["items"]] == ["kept"]
+    assert rank_projects(db, user.id, [], 10)["items"] == []
+
+
+def test_reindex_backfills_missing_terms(db, user):
+    for i in range(5):
+        _add_project(db, user.id, f"p{i}", f"Python Kafka 项目{i}")
+    db.commit()
+    db.execute(delete(ProjectTerm))
+    db.commit()
+    assert _ranked_titles(db, user.id, ["Kafka"]) == []
+
+    assert reindex_projects(db, chunk_size=2) == {"indexed": 5}
+    assert _ranked_titles(db, user.id, ["Kafka"]) == ["p0", "p1", "p2", "p3", "p4"]
+    assert reindex_projects(db, chunk_size=2) == {"indexed": 0}
+
+    terms = db.execute(select(func.count()).select_from(ProjectTerm)).scalar_one()
+    assert reindex_projects(db, force=True) == {"indexed": 5}
+    assert db.execute(select(func.count()).select_from(ProjectTerm)).scalar_one() == terms